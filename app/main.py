@@ -3,18 +3,19 @@
 import logging
 import json
 import asyncio
+import httpx
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.models import init_database, SettingsDB, TailscaleDevicesDB, DeviceRoutingDB, PIARegionsDB
+from app.models import init_database, close_db_pool, start_log_writer, stop_log_writer, SettingsDB, TailscaleDevicesDB, DeviceRoutingDB, PIARegionsDB
 from app.routers import settings, devices, status
-from app.services import get_tailscale_service, get_pia_service, get_routing_service
+from app.services import get_tailscale_service, get_pia_service, get_routing_service, get_status_snapshotter
 
 # Configure logging
 logging.basicConfig(
@@ -46,7 +47,8 @@ async def restore_routing_rules() -> int:
     try:
         # Ensure container traffic always uses main table (not VPN)
         import subprocess
-        result = subprocess.run(
+        result = await asyncio.to_thread(
+            subprocess.run,
             ["ip", "rule", "list"],
             capture_output=True,
             text=True,
@@ -55,7 +57,8 @@ async def restore_routing_rules() -> int:
 
         # Check if container routing rule exists
         if "from 10.36.0.102 lookup main" not in result.stdout:
-            subprocess.run(
+            await asyncio.to_thread(
+                subprocess.run,
                 ["ip", "rule", "add", "from", "10.36.0.102", "table", "main", "priority", "100"],
                 check=True,
                 capture_output=True
@@ -76,7 +79,9 @@ async def restore_routing_rules() -> int:
         pia_service = get_pia_service()
         routing_service = get_routing_service()
 
-        # Restore routing for each enabled device
+        # Collect enabled devices and the regions they route through
+        devices_to_restore = []
+        regions = {}
         for config in routing_configs:
             if not config.get("enabled") or not config.get("region_id"):
                 continue
@@ -99,21 +104,27 @@ async def restore_routing_rules() -> int:
             device_ip = ip_addresses[0]
 
             # Get region info
-            region = await PIARegionsDB.get_by_id(region_id)
+            region = regions.get(region_id) or await PIARegionsDB.get_by_id(region_id)
             if not region:
                 logger.warning(f"Region {region_id} not found for device {device['hostname']}, skipping")
                 continue
 
-            try:
-                # Ensure VPN connection
-                success = await pia_service.ensure_region_connection(
-                    region_id=region_id,
-                    region_data=region,
-                    username=pia_credentials["username"],
-                    password=pia_credentials["password"]
-                )
+            regions[region_id] = region
+            devices_to_restore.append((device, device_ip, region_id))
 
-                if not success:
+        # Bring up all needed VPN connections at once
+        connected = await pia_service.ensure_region_connections(
+            regions,
+            username=pia_credentials["username"],
+            password=pia_credentials["password"]
+        )
+
+        # Restore routing for each enabled device
+        for device, device_ip, region_id in devices_to_restore:
+            region = regions[region_id]
+
+            try:
+                if not connected.get(region_id):
                     logger.error(f"Failed to connect to region {region['name']} for device {device['hostname']}")
                     continue
 
@@ -209,7 +220,8 @@ async def reconciliation_loop():
                 interface_name = pia_service._get_interface_name(region_id)
 
                 # Check if interface exists
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     ["ip", "link", "show", interface_name],
                     capture_output=True,
                     check=False
@@ -235,7 +247,8 @@ async def reconciliation_loop():
                     logger.info(f"Reconciliation: Restored VPN connection {interface_name}")
 
                 # Check if routing rule exists
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     ["ip", "rule", "list"],
                     capture_output=True,
                     text=True,
@@ -250,8 +263,10 @@ async def reconciliation_loop():
                     if not rule_exists:
                         logger.warning(f"Reconciliation: Routing rule missing for {device['hostname']} ({device_ip}), restoring...")
 
-                        # Restore routing rule
-                        success = await routing_service.enable_device_routing(device_ip, interface_name)
+                        # Restore routing rule (the in-memory rule shadow is stale)
+                        success = await routing_service.enable_device_routing(
+                            device_ip, interface_name, force=True
+                        )
 
                         if success:
                             logger.info(f"Reconciliation: Restored routing for {device['hostname']}")
@@ -259,8 +274,7 @@ async def reconciliation_loop():
                             logger.error(f"Reconciliation: Failed to restore routing for {device['hostname']}")
 
                 # Collect device for parallel drift checking (only Linux devices)
-                device_os = device.get("os", "").lower()
-                if device_os == "linux" and expected_exit_node_ip:
+                if device["os_norm"] == "linux" and expected_exit_node_ip:
                     devices_to_check_drift.append({
                         "device": device,
                         "device_ip": device_ip,
@@ -331,6 +345,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
 
+    # Start batched connection log writer
+    start_log_writer()
+
     # Load Tailscale API key if configured
     try:
         api_key = await SettingsDB.get("tailscale_api_key")
@@ -358,10 +375,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to restore routing rules: {e}")
 
+    # Shared HTTP client for outbound API calls (keeps connections alive between requests)
+    app.state.http_client = httpx.AsyncClient(
+        timeout=10.0,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20)
+    )
+
     # Start background reconciliation loop
     reconciliation_task = asyncio.create_task(reconciliation_loop())
     logger.info("Background reconciliation loop started")
 
+    # Start VPN status monitor (keeps the shared status snapshot fresh)
+    status_monitor_task = asyncio.create_task(get_status_snapshotter().monitor())
+    logger.info("VPN status monitor started")
+
+    # Start WebSocket VPN status broadcaster
+    broadcaster_task = asyncio.create_task(status.vpn_status_broadcaster())
+    logger.info("VPN status broadcaster started")
+
     logger.info("Application startup complete")
 
     yield
@@ -374,13 +406,32 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         logger.info("Reconciliation loop stopped")
 
+    broadcaster_task.cancel()
+    try:
+        await broadcaster_task
+    except asyncio.CancelledError:
+        logger.info("VPN status broadcaster stopped")
+
+    status_monitor_task.cancel()
+    try:
+        await status_monitor_task
+    except asyncio.CancelledError:
+        logger.info("VPN status monitor stopped")
+
+    await app.state.http_client.aclose()
+    await get_pia_service().close()
+    await get_tailscale_service().close()
+    await stop_log_writer()
+    await close_db_pool()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Tailscale PIA Router",
     description="Web application to manage PIA VPN as a Tailscale exit node",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
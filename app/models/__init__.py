@@ -3,11 +3,15 @@
 from .database import (
     init_database,
     get_db,
+    close_db_pool,
+    start_log_writer,
+    stop_log_writer,
     SettingsDB,
     PIARegionsDB,
     TailscaleDevicesDB,
     DeviceRoutingDB,
     ConnectionLogDB,
+    GeolocationCacheDB,
 )
 from .schemas import (
     PIACredentials,
@@ -31,11 +35,15 @@ from .schemas import (
 __all__ = [
     "init_database",
     "get_db",
+    "close_db_pool",
+    "start_log_writer",
+    "stop_log_writer",
     "SettingsDB",
     "PIARegionsDB",
     "TailscaleDevicesDB",
     "DeviceRoutingDB",
     "ConnectionLogDB",
+    "GeolocationCacheDB",
     "PIACredentials",
     "TailscaleAPIKey",
     "RegionSelect",
@@ -1,13 +1,31 @@
 """Database models and initialization for Tailscale PIA Router."""
 
+import asyncio
 import aiosqlite
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
-import json
-from datetime import datetime
+import orjson
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
 
 DATABASE_PATH = Path(__file__).parent.parent.parent / "data" / "app.db"
 
+# In-process cache for PIARegionsDB.get_by_id. Regions only change when the
+# server list is refreshed, so writers bump the version and clear the cache.
+_region_cache: dict[str, dict] = {}
+_region_cache_version: int = 0
+_region_cache_lock = asyncio.Lock()
+
+
+def _invalidate_region_cache():
+    """Clear cached regions after the pia_regions table changes."""
+    global _region_cache_version
+    _region_cache_version += 1
+    _region_cache.clear()
+
 
 async def get_db():
     """Get database connection."""
@@ -16,6 +34,93 @@ async def get_db():
     return db
 
 
+class ConnectionPool:
+    """Pool of long-lived aiosqlite connections.
+
+    Reusing connections avoids the open/close cost on every query and keeps
+    SQLite's page cache warm between requests.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a new pooled connection."""
+        db = await get_db()
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        """Take an idle connection, opening a new one while below pool size."""
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        if self._created < self.size:
+            self._created += 1
+            try:
+                return await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+
+        return await self._idle.get()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the duration of the context."""
+        db = await self._acquire()
+        try:
+            yield db
+        except BaseException:
+            # Don't hand a connection with an open transaction to the next user
+            try:
+                await db.rollback()
+            except Exception:
+                self._created -= 1
+                await db.close()
+                raise
+            self._idle.put_nowait(db)
+            raise
+        else:
+            self._idle.put_nowait(db)
+
+    async def close(self):
+        """Close all idle connections."""
+        while not self._idle.empty():
+            db = self._idle.get_nowait()
+            self._created -= 1
+            await db.close()
+
+
+# Sized for a handful of concurrent requests plus the background loops
+DB_POOL_SIZE = 8
+_pool: Optional[ConnectionPool] = None
+
+
+def pooled_db():
+    """Borrow a connection from the shared pool.
+
+    Usage: ``async with pooled_db() as db: ...``
+    """
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(DB_POOL_SIZE)
+    return _pool.connection()
+
+
+async def close_db_pool():
+    """Close pooled database connections (called on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
 async def init_database():
     """Initialize database schema."""
     DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -52,12 +157,20 @@ async def init_database():
                 hostname TEXT NOT NULL,
                 ip_addresses TEXT NOT NULL,
                 os TEXT,
+                os_norm TEXT,
                 last_seen TIMESTAMP,
                 online BOOLEAN DEFAULT 0,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
 
+        # Migrate existing devices table: add normalized (lowercase) OS column
+        async with db.execute("PRAGMA table_info(tailscale_devices)") as cursor:
+            device_columns = {row["name"] for row in await cursor.fetchall()}
+        if "os_norm" not in device_columns:
+            await db.execute("ALTER TABLE tailscale_devices ADD COLUMN os_norm TEXT")
+            await db.execute("UPDATE tailscale_devices SET os_norm = LOWER(COALESCE(os, ''))")
+
         # Device routing configuration
         await db.execute("""
             CREATE TABLE IF NOT EXISTS device_routing (
@@ -82,6 +195,15 @@ async def init_database():
             )
         """)
 
+        # Geolocation lookups (cached ipapi.co responses)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS geolocation_cache (
+                ip TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
         # Create indexes
         await db.execute("CREATE INDEX IF NOT EXISTS idx_connection_log_timestamp ON connection_log(timestamp)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_connection_log_event_type ON connection_log(event_type)")
@@ -97,37 +219,38 @@ class SettingsDB:
     @staticmethod
     async def get(key: str) -> Optional[str]:
         """Get a setting value."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute("SELECT value FROM settings WHERE key = ?", (key,)) as cursor:
                 row = await cursor.fetchone()
                 return row["value"] if row else None
-        finally:
-            await db.close()
 
     @staticmethod
     async def set(key: str, value: str):
         """Set a setting value."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             await db.execute(
                 "INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)",
                 (key, value, datetime.utcnow().isoformat())
             )
             await db.commit()
-        finally:
-            await db.close()
+
+    @staticmethod
+    async def delete(key: str):
+        """Delete a setting."""
+        async with pooled_db() as db:
+            await db.execute("DELETE FROM settings WHERE key = ?", (key,))
+            await db.commit()
 
     @staticmethod
     async def get_json(key: str) -> Optional[dict]:
         """Get a JSON setting value."""
         value = await SettingsDB.get(key)
-        return json.loads(value) if value else None
+        return orjson.loads(value) if value else None
 
     @staticmethod
     async def set_json(key: str, value: dict):
         """Set a JSON setting value."""
-        await SettingsDB.set(key, json.dumps(value))
+        await SettingsDB.set(key, orjson.dumps(value).decode())
 
 
 class PIARegionsDB:
@@ -137,8 +260,7 @@ class PIARegionsDB:
     async def upsert(region_id: str, name: str, country: str, dns: str,
                      port_forward: bool, geo: bool, servers: str):
         """Insert or update a PIA region."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO pia_regions
                 (id, name, country, dns, port_forward, geo, servers, updated_at)
@@ -146,30 +268,115 @@ class PIARegionsDB:
             """, (region_id, name, country, dns, port_forward, geo, servers,
                   datetime.utcnow().isoformat()))
             await db.commit()
-        finally:
-            await db.close()
+            _invalidate_region_cache()
+
+    @staticmethod
+    async def upsert_many(regions: list[dict]):
+        """Insert or update multiple PIA regions in a single transaction.
+
+        Args:
+            regions: Region dicts as returned by PIAService.fetch_server_list()
+        """
+        updated_at = datetime.utcnow().isoformat()
+        rows = [
+            (
+                region["id"],
+                region["name"],
+                region["country"],
+                region["dns"],
+                region["port_forward"],
+                region["geo"],
+                region["servers"],
+                updated_at
+            )
+            for region in regions
+        ]
+
+        async with pooled_db() as db:
+            await db.executemany("""
+                INSERT OR REPLACE INTO pia_regions
+                (id, name, country, dns, port_forward, geo, servers, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            await db.commit()
+            _invalidate_region_cache()
 
     @staticmethod
     async def get_all():
         """Get all PIA regions."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute("SELECT * FROM pia_regions ORDER BY name") as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
-        finally:
-            await db.close()
 
     @staticmethod
     async def get_by_id(region_id: str):
-        """Get a PIA region by ID."""
-        db = await get_db()
-        try:
-            async with db.execute("SELECT * FROM pia_regions WHERE id = ?", (region_id,)) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
-        finally:
-            await db.close()
+        """Get a PIA region by ID (served from the in-process cache when possible).
+
+        The returned dict is shared with the cache and must not be modified.
+        """
+        region = _region_cache.get(region_id)
+        if region is not None:
+            return region
+
+        async with _region_cache_lock:
+            # Another task may have loaded it while we waited for the lock
+            region = _region_cache.get(region_id)
+            if region is not None:
+                return region
+
+            version = _region_cache_version
+            async with pooled_db() as db:
+                async with db.execute("SELECT * FROM pia_regions WHERE id = ?", (region_id,)) as cursor:
+                    row = await cursor.fetchone()
+
+            if not row:
+                return None
+
+            region = dict(row)
+            # Don't cache a row read while the table was being refreshed
+            if version == _region_cache_version:
+                _region_cache[region_id] = region
+            return region
+
+    @staticmethod
+    async def get_by_ids(region_ids) -> dict[str, dict]:
+        """Get multiple PIA regions by ID with a single query.
+
+        Args:
+            region_ids: Iterable of region IDs
+
+        Returns:
+            Dict mapping region ID to region row (missing IDs are omitted)
+        """
+        regions = {}
+        missing = []
+        for region_id in set(region_ids):
+            region = _region_cache.get(region_id)
+            if region is not None:
+                regions[region_id] = region
+            else:
+                missing.append(region_id)
+
+        if not missing:
+            return regions
+
+        version = _region_cache_version
+        placeholders = ", ".join("?" * len(missing))
+        async with pooled_db() as db:
+            async with db.execute(
+                f"SELECT * FROM pia_regions WHERE id IN ({placeholders})",
+                missing
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        for row in rows:
+            region = dict(row)
+            regions[region["id"]] = region
+            if version == _region_cache_version:
+                _region_cache[region["id"]] = region
+
+        return regions
 
 
 class TailscaleDevicesDB:
@@ -179,39 +386,73 @@ class TailscaleDevicesDB:
     async def upsert(device_id: str, hostname: str, ip_addresses: str,
                      os: str, last_seen: str, online: bool):
         """Insert or update a Tailscale device."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO tailscale_devices
-                (id, hostname, ip_addresses, os, last_seen, online, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (device_id, hostname, ip_addresses, os, last_seen, online,
+                (id, hostname, ip_addresses, os, os_norm, last_seen, online, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (device_id, hostname, ip_addresses, os, (os or "").lower(), last_seen, online,
                   datetime.utcnow().isoformat()))
             await db.commit()
-        finally:
-            await db.close()
+
+    @staticmethod
+    async def upsert_many(devices: list[dict]):
+        """Insert or update multiple Tailscale devices in a single transaction.
+
+        Args:
+            devices: Device dicts as returned by TailscaleService.get_devices()
+        """
+        updated_at = datetime.utcnow().isoformat()
+        rows = [
+            (
+                device["id"],
+                device["hostname"],
+                orjson.dumps(device["ip_addresses"]).decode(),
+                device.get("os"),
+                (device.get("os") or "").lower(),
+                device.get("last_seen"),
+                device["online"],
+                updated_at
+            )
+            for device in devices
+        ]
+
+        async with pooled_db() as db:
+            await db.executemany("""
+                INSERT OR REPLACE INTO tailscale_devices
+                (id, hostname, ip_addresses, os, os_norm, last_seen, online, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            await db.commit()
 
     @staticmethod
     async def get_all():
         """Get all Tailscale devices."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute("SELECT * FROM tailscale_devices ORDER BY hostname") as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
-        finally:
-            await db.close()
 
     @staticmethod
     async def get_by_id(device_id: str):
         """Get a Tailscale device by ID."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute("SELECT * FROM tailscale_devices WHERE id = ?", (device_id,)) as cursor:
                 row = await cursor.fetchone()
                 return dict(row) if row else None
-        finally:
-            await db.close()
+
+
+# Cached region IDs of enabled device routes. Writers bump the version and drop
+# the cache, so status polling doesn't re-read the routing table every time.
+_enabled_region_ids: Optional[list[str]] = None
+_device_routing_version: int = 0
+
+
+def _device_routing_changed():
+    """Invalidate cached device routing lookups after a write."""
+    global _enabled_region_ids, _device_routing_version
+    _device_routing_version += 1
+    _enabled_region_ids = None
 
 
 class DeviceRoutingDB:
@@ -220,8 +461,7 @@ class DeviceRoutingDB:
     @staticmethod
     async def set_enabled(device_id: str, enabled: bool, region_id: Optional[str] = None):
         """Set routing enabled status for a device."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             # Check if row exists
             async with db.execute(
                 "SELECT 1 FROM device_routing WHERE device_id = ?",
@@ -251,14 +491,13 @@ class DeviceRoutingDB:
                 """, (device_id, enabled, region_id, datetime.utcnow().isoformat()))
 
             await db.commit()
-        finally:
-            await db.close()
+
+        _device_routing_changed()
 
     @staticmethod
     async def set_region(device_id: str, region_id: Optional[str]):
         """Set the region for a device (None to clear)."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             # Check if row exists
             async with db.execute(
                 "SELECT 1 FROM device_routing WHERE device_id = ?",
@@ -281,61 +520,159 @@ class DeviceRoutingDB:
                 """, (device_id, region_id, datetime.utcnow().isoformat()))
 
             await db.commit()
-        finally:
-            await db.close()
+
+        _device_routing_changed()
 
     @staticmethod
     async def get_region(device_id: str) -> Optional[str]:
         """Get the region for a device."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute(
                 "SELECT region_id FROM device_routing WHERE device_id = ?",
                 (device_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 return row["region_id"] if row else None
-        finally:
-            await db.close()
 
     @staticmethod
     async def is_enabled(device_id: str) -> bool:
         """Check if routing is enabled for a device."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute(
                 "SELECT enabled FROM device_routing WHERE device_id = ?",
                 (device_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 return bool(row["enabled"]) if row else False
-        finally:
-            await db.close()
 
     @staticmethod
     async def get_all():
         """Get all device routing configurations."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute("SELECT * FROM device_routing") as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
-        finally:
-            await db.close()
+
+    @staticmethod
+    async def get_enabled_region_ids() -> list[str]:
+        """Get the distinct regions used by enabled devices, in routing table order (cached).
+
+        The returned list is shared and must not be modified.
+        """
+        global _enabled_region_ids
+        if _enabled_region_ids is not None:
+            return _enabled_region_ids
+
+        version = _device_routing_version
+        async with pooled_db() as db:
+            async with db.execute(
+                "SELECT region_id FROM device_routing WHERE enabled = 1 ORDER BY rowid"
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        region_ids = list(dict.fromkeys(row["region_id"] for row in rows if row["region_id"]))
+
+        # Don't cache a result that a concurrent write may already have changed
+        if version == _device_routing_version:
+            _enabled_region_ids = region_ids
+        return region_ids
 
     @staticmethod
     async def get_devices_by_region(region_id: str):
         """Get all devices using a specific region."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute(
                 "SELECT * FROM device_routing WHERE region_id = ? AND enabled = 1",
                 (region_id,)
             ) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
-        finally:
-            await db.close()
+
+
+# Background connection log writes (kept referenced until they finish)
+_pending_log_writes: set[asyncio.Task] = set()
+
+# Queued connection log entries, written in batches by _log_writer
+LOG_QUEUE_SIZE = 1000
+LOG_FLUSH_INTERVAL = 0.05  # Seconds to collect entries before writing a batch
+_log_queue: Optional[asyncio.Queue] = None
+_log_writer_task: Optional[asyncio.Task] = None
+
+# Cached connection log row count. Writers bump the version and keep a cached
+# count up to date, so get_count only runs COUNT(*) once per process.
+_log_count: Optional[int] = None
+_log_count_version: int = 0
+
+
+def _log_write_done(task: asyncio.Task):
+    """Forget a finished background log write and report its failure, if any."""
+    _pending_log_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Failed to write connection log entry: {task.exception()}")
+
+
+def _count_log_entries_added(count: int):
+    """Account for newly written connection log entries in the cached count."""
+    global _log_count, _log_count_version
+    _log_count_version += 1
+    if _log_count is not None:
+        _log_count += count
+
+
+def _drain_log_queue(queue: asyncio.Queue) -> list[tuple]:
+    """Take all entries currently waiting in the log queue."""
+    entries = []
+    while not queue.empty():
+        entries.append(queue.get_nowait())
+    return entries
+
+
+async def _log_writer(queue: asyncio.Queue):
+    """Background task that writes queued connection log entries in batches.
+
+    A None entry asks the writer to flush what is queued and stop.
+    """
+    while True:
+        entry = await queue.get()
+
+        if entry is not None:
+            # Give other entries from the same burst a chance to join this batch
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+
+        batch = [entry] + _drain_log_queue(queue)
+        entries = [e for e in batch if e is not None]
+
+        if entries:
+            try:
+                await ConnectionLogDB.add_many(entries)
+            except Exception as e:
+                logger.error(f"Failed to write {len(entries)} connection log entries: {e}")
+
+        if len(entries) < len(batch):
+            return
+
+
+def start_log_writer():
+    """Start the batched connection log writer (called on application startup)."""
+    global _log_queue, _log_writer_task
+    if _log_writer_task is None:
+        _log_queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+        _log_writer_task = asyncio.create_task(_log_writer(_log_queue))
+
+
+async def stop_log_writer():
+    """Flush pending connection log entries and stop the writer (called on shutdown)."""
+    global _log_queue, _log_writer_task
+    if _log_writer_task is None:
+        return
+
+    queue, task = _log_queue, _log_writer_task
+    # Entries logged from here on are written directly
+    _log_queue = None
+    _log_writer_task = None
+
+    await queue.put(None)
+    await task
 
 
 class ConnectionLogDB:
@@ -345,37 +682,133 @@ class ConnectionLogDB:
     async def add(event_type: str, status: str, region_id: Optional[str] = None,
                   message: Optional[str] = None):
         """Add a connection log entry."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             await db.execute("""
                 INSERT INTO connection_log (event_type, region_id, status, message, timestamp)
                 VALUES (?, ?, ?, ?, ?)
             """, (event_type, region_id, status, message, datetime.utcnow().isoformat()))
             await db.commit()
-        finally:
-            await db.close()
+            _count_log_entries_added(1)
+
+    @staticmethod
+    async def add_many(entries: list[tuple]):
+        """Add multiple connection log entries in a single transaction.
+
+        Args:
+            entries: (event_type, region_id, status, message, timestamp) tuples
+        """
+        async with pooled_db() as db:
+            await db.executemany("""
+                INSERT INTO connection_log (event_type, region_id, status, message, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, entries)
+            await db.commit()
+            _count_log_entries_added(len(entries))
+
+    @staticmethod
+    def add_nowait(event_type: str, status: str, region_id: Optional[str] = None,
+                   message: Optional[str] = None):
+        """Add a connection log entry in the background without waiting for the write.
+
+        Meant for success paths where the response shouldn't wait on SQLite;
+        failures are logged rather than raised. Entries are batched by the log
+        writer when it is running.
+        """
+        entry = (event_type, region_id, status, message, datetime.utcnow().isoformat())
+
+        if _log_queue is not None:
+            try:
+                _log_queue.put_nowait(entry)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Connection log queue full, writing entry directly")
+
+        task = asyncio.create_task(ConnectionLogDB.add_many([entry]))
+        _pending_log_writes.add(task)
+        task.add_done_callback(_log_write_done)
 
     @staticmethod
     async def get_recent(limit: int = 100, offset: int = 0):
         """Get recent connection log entries with pagination."""
-        db = await get_db()
-        try:
+        async with pooled_db() as db:
             async with db.execute(
                 "SELECT * FROM connection_log ORDER BY timestamp DESC LIMIT ? OFFSET ?",
                 (limit, offset)
             ) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
-        finally:
-            await db.close()
+
+    @staticmethod
+    async def get_recent_before(before_id: Optional[int] = None, limit: int = 100):
+        """Get connection log entries older than a given entry (keyset pagination).
+
+        Args:
+            before_id: Only return entries with a smaller ID (None for the newest entries)
+            limit: Maximum number of entries to return
+
+        Returns:
+            Log entries, newest first
+        """
+        async with pooled_db() as db:
+            if before_id is None:
+                query = "SELECT * FROM connection_log ORDER BY id DESC LIMIT ?"
+                params = (limit,)
+            else:
+                query = "SELECT * FROM connection_log WHERE id < ? ORDER BY id DESC LIMIT ?"
+                params = (before_id, limit)
+
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
 
     @staticmethod
     async def get_count():
-        """Get total count of log entries."""
-        db = await get_db()
-        try:
+        """Get total count of log entries (cached after the first call)."""
+        global _log_count
+        if _log_count is not None:
+            return _log_count
+
+        version = _log_count_version
+        async with pooled_db() as db:
             async with db.execute("SELECT COUNT(*) as count FROM connection_log") as cursor:
                 row = await cursor.fetchone()
-                return row["count"] if row else 0
-        finally:
-            await db.close()
+                count = row["count"] if row else 0
+
+        # Don't cache a count that raced with a write
+        if version == _log_count_version:
+            _log_count = count
+        return count
+
+
+class GeolocationCacheDB:
+    """Database operations for cached geolocation lookups."""
+
+    @staticmethod
+    async def get(ip: str, max_age: float) -> Optional[dict]:
+        """Get cached geolocation data for an IP if it is recent enough.
+
+        Args:
+            ip: IP address
+            max_age: Maximum age of the cached entry in seconds
+
+        Returns:
+            Geolocation data, or None if not cached or expired
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=max_age)).isoformat()
+        async with pooled_db() as db:
+            async with db.execute(
+                "SELECT data FROM geolocation_cache WHERE ip = ? AND updated_at >= ?",
+                (ip, cutoff)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return orjson.loads(row["data"]) if row else None
+
+    @staticmethod
+    async def set(ip: str, data: dict):
+        """Store geolocation data for an IP."""
+        async with pooled_db() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO geolocation_cache (ip, data, updated_at) VALUES (?, ?, ?)",
+                (ip, orjson.dumps(data).decode(), datetime.utcnow().isoformat())
+            )
+            await db.commit()
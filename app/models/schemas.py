@@ -113,6 +113,7 @@ class ConnectionLogList(BaseModel):
     total: int = 0
     limit: int = 100
     offset: int = 0
+    next_before_id: Optional[int] = None
 
 
 # Response Schemas
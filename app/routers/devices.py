@@ -2,8 +2,8 @@
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 import logging
-import json
 import asyncio
+import orjson
 
 from app.models import (
     TailscaleDeviceList,
@@ -28,8 +28,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/devices", tags=["devices"])
 
+# Normalized (lowercase) OS names, matched against the os_norm device field
+_GUI_OS = frozenset({"macos", "ios"})  # Routing follows region selection automatically
+_CLEAR_REGION_ON_DISABLE_OS = frozenset({"ios", "android", "windows", "macos"})
 
-@router.get("")
+
+@router.get("", response_model=None)
 async def get_devices() -> TailscaleDeviceList:
     """Get list of all Tailscale devices.
 
@@ -48,23 +52,17 @@ async def get_devices() -> TailscaleDeviceList:
         devices = await tailscale_service.get_devices()
 
         # Update database
-        for device in devices:
-            await TailscaleDevicesDB.upsert(
-                device["id"],
-                device["hostname"],
-                json.dumps(device["ip_addresses"]),
-                device.get("os"),
-                device.get("last_seen"),
-                device["online"]
-            )
+        await TailscaleDevicesDB.upsert_many(devices)
+
+        # Regions with an active VPN interface, fetched lazily (at most once per request)
+        # so auto-managed devices can skip ensure_region_connection when already up
+        active_region_ids = None
 
         # Get routing status for each device
         device_list = []
         for device in devices:
-            device_os = device.get("os", "").lower()
-
             # Determine if device should be auto-managed (macOS/iOS)
-            is_auto_managed = device_os in ["macos", "ios"]
+            is_auto_managed = device["os_norm"] in _GUI_OS
 
             # Get current routing status and region
             routing_enabled = await DeviceRoutingDB.is_enabled(device["id"])
@@ -90,19 +88,26 @@ async def get_devices() -> TailscaleDeviceList:
                         pia_interface = pia_service._get_interface_name(region_id)
 
                         # Check if region connection is active, if not it will be created
-                        region_data = await PIARegionsDB.get_by_id(region_id)
-                        if region_data:
-                            # Ensure connection exists
-                            pia_credentials = await SettingsDB.get_json("pia_credentials")
-                            if pia_credentials:
-                                await pia_service.ensure_region_connection(
-                                    region_id=region_id,
-                                    region_data=region_data,
-                                    username=pia_credentials["username"],
-                                    password=pia_credentials["password"]
-                                )
-
-                        await routing_service.enable_device_routing(device_ip, pia_interface)
+                        if active_region_ids is None:
+                            active_connections = await pia_service.get_active_connections()
+                            active_region_ids = {conn["region_id"] for conn in active_connections}
+
+                        if region_id not in active_region_ids:
+                            region_data = await PIARegionsDB.get_by_id(region_id)
+                            if region_data:
+                                # Ensure connection exists
+                                pia_credentials = await SettingsDB.get_json("pia_credentials")
+                                if pia_credentials:
+                                    success = await pia_service.ensure_region_connection(
+                                        region_id=region_id,
+                                        region_data=region_data,
+                                        username=pia_credentials["username"],
+                                        password=pia_credentials["password"]
+                                    )
+                                    if success:
+                                        active_region_ids.add(region_id)
+
+                        await routing_service.enable_device_routing(device_ip, pia_interface, force=True)
                         await DeviceRoutingDB.set_enabled(device["id"], True)
                         routing_enabled = True
                         logger.info(f"Auto-enabled routing for {device['hostname']} to region {region_id}")
@@ -156,7 +161,7 @@ async def toggle_device_routing(
             raise HTTPException(status_code=404, detail="Device not found")
 
         # Parse IP addresses
-        ip_addresses = json.loads(device["ip_addresses"])
+        ip_addresses = orjson.loads(device["ip_addresses"])
         if not ip_addresses:
             raise HTTPException(status_code=400, detail="Device has no IP addresses")
 
@@ -206,7 +211,7 @@ async def toggle_device_routing(
 
             # Enable routing with the specific PIA interface
             pia_interface = pia_service._get_interface_name(region_id)
-            success = await routing_service.enable_device_routing(device_ip, pia_interface)
+            success = await routing_service.enable_device_routing(device_ip, pia_interface, force=True)
             action = "enabled"
         else:
             # Disable routing
@@ -225,7 +230,7 @@ async def toggle_device_routing(
             if region_id:
                 # For auto-managed devices, clear the region_id to prevent auto-re-enable
                 # Check if device is auto-managed (GUI clients like iPhone)
-                is_auto_managed = device.get("os") in ["iOS", "android", "windows", "macOS"]
+                is_auto_managed = device["os_norm"] in _CLEAR_REGION_ON_DISABLE_OS
                 if is_auto_managed:
                     await DeviceRoutingDB.set_region(device_id, None)
                     logger.info(f"Cleared region for auto-managed device {device['hostname']} to prevent auto-re-enable")
@@ -239,7 +244,7 @@ async def toggle_device_routing(
                     logger.info(f"Disconnected unused VPN region {region_id}")
 
         # Log event
-        await ConnectionLogDB.add(
+        ConnectionLogDB.add_nowait(
             "device_routing",
             "success",
             message=f"Routing {action} for device {device['hostname']} ({device_ip})"
@@ -256,7 +261,7 @@ async def toggle_device_routing(
 
         # If enabling routing, attempt SSH automation or provide manual command
         if target_enabled and container_ip:
-            device_os = device.get("os", "").lower()
+            device_os = device["os_norm"]
             device_hostname = device.get("hostname")
 
             # Try SSH automation for Linux devices
@@ -294,7 +299,7 @@ async def toggle_device_routing(
 
         # If disabling, attempt SSH to clear exit node
         elif not target_enabled and container_ip:
-            device_os = device.get("os", "").lower()
+            device_os = device["os_norm"]
             device_hostname = device.get("hostname")
 
             if device_os == "linux":
@@ -358,22 +363,21 @@ async def _establish_vpn_and_routing(
             )
             return
 
-        # Enable routing
+        # Enable routing, mark as enabled in database and log the event concurrently
         pia_interface = pia_service._get_interface_name(region_id)
-        await routing_service.enable_device_routing(device_ip, pia_interface)
-
-        # Mark as enabled in database
-        await DeviceRoutingDB.set_enabled(device_id, True)
+        await asyncio.gather(
+            routing_service.enable_device_routing(device_ip, pia_interface, force=True),
+            DeviceRoutingDB.set_enabled(device_id, True),
+            ConnectionLogDB.add(
+                "device_region",
+                "success",
+                region_id=region_id,
+                message=f"Region set to {region_data['name']} for device {device_hostname}"
+            )
+        )
 
         logger.info(f"Background task complete: {device_hostname} now routing through {region_data['name']}")
 
-        await ConnectionLogDB.add(
-            "device_region",
-            "success",
-            region_id=region_id,
-            message=f"Region set to {region_data['name']} for device {device_hostname}"
-        )
-
     except Exception as e:
         logger.error(f"Background task error for {device_hostname}: {e}")
         await ConnectionLogDB.add(
@@ -409,13 +413,12 @@ async def set_device_region(
 
         # Get old region before updating
         old_region_id = await DeviceRoutingDB.get_region(device_id)
-        device_os = device.get("os", "").lower()
-        is_gui_device = device_os in ["macos", "ios"]
+        is_gui_device = device["os_norm"] in _GUI_OS
 
         # Case 1: Clearing region (None or empty string)
         if not region_select.region_id:
             # Disable routing
-            ip_addresses = json.loads(device["ip_addresses"])
+            ip_addresses = orjson.loads(device["ip_addresses"])
             if ip_addresses:
                 device_ip = ip_addresses[0]
                 routing_service = get_routing_service()
@@ -433,7 +436,7 @@ async def set_device_region(
                     await pia_service.disconnect_region(old_region_id)
                     logger.info(f"Disconnected unused VPN region {old_region_id}")
 
-            await ConnectionLogDB.add(
+            ConnectionLogDB.add_nowait(
                 "device_region",
                 "success",
                 message=f"Region cleared for device {device['hostname']}"
@@ -455,7 +458,7 @@ async def set_device_region(
 
         # If routing was enabled with a different region, reconnect to new region
         if was_enabled and old_region_id and old_region_id != region_select.region_id:
-            ip_addresses = json.loads(device["ip_addresses"])
+            ip_addresses = orjson.loads(device["ip_addresses"])
             if ip_addresses:
                 device_ip = ip_addresses[0]
                 routing_service = get_routing_service()
@@ -465,7 +468,7 @@ async def set_device_region(
                 logger.info(f"Disabled old region {old_region_id} for {device['hostname']}")
 
                 # Then reconnect to new region
-                await routing_service.enable_device_routing(device_ip, region_select.region_id)
+                await routing_service.enable_device_routing(device_ip, region_select.region_id, force=True)
                 logger.info(f"Reconnected {device['hostname']} to new region {region_select.region_id}")
 
         # Check if old region needs cleanup
@@ -477,7 +480,7 @@ async def set_device_region(
                 await pia_service.disconnect_region(old_region_id)
                 logger.info(f"Disconnected unused VPN region {old_region_id}")
 
-        await ConnectionLogDB.add(
+        ConnectionLogDB.add_nowait(
             "device_region",
             "success",
             region_id=region_select.region_id,
@@ -536,15 +539,7 @@ async def sync_devices() -> SuccessResponse:
         devices = await tailscale_service.get_devices()
 
         # Update database
-        for device in devices:
-            await TailscaleDevicesDB.upsert(
-                device["id"],
-                device["hostname"],
-                json.dumps(device["ip_addresses"]),
-                device.get("os"),
-                device.get("last_seen"),
-                device["online"]
-            )
+        await TailscaleDevicesDB.upsert_many(devices)
 
         logger.info(f"Synced {len(devices)} Tailscale devices")
         return SuccessResponse(message=f"Synced {len(devices)} devices")
@@ -1,8 +1,10 @@
 """Settings API router for PIA and Tailscale configuration."""
 
 from fastapi import APIRouter, HTTPException
-from typing import Dict
+from typing import Dict, Optional
+import asyncio
 import logging
+import time
 
 from app.models import (
     PIACredentials,
@@ -25,6 +27,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
+# Cached /regions response (monotonic timestamp, response); cleared on refresh
+REGIONS_CACHE_TTL = 600  # seconds
+_regions_cache: Optional[tuple[float, PIARegionList]] = None
+_regions_cache_lock = asyncio.Lock()
+
+
+def _invalidate_regions_cache():
+    """Drop the cached /regions response."""
+    global _regions_cache
+    _regions_cache = None
+
 
 @router.post("/pia")
 async def save_pia_credentials(credentials: PIACredentials) -> SuccessResponse:
@@ -48,8 +61,11 @@ async def save_pia_credentials(credentials: PIACredentials) -> SuccessResponse:
             "password": credentials.password
         })
 
+        # Tokens obtained with the old credentials must not be reused
+        await get_pia_service().invalidate_auth_token()
+
         # Log event
-        await ConnectionLogDB.add("config", "success", message="PIA credentials saved")
+        ConnectionLogDB.add_nowait("config", "success", message="PIA credentials saved")
 
         logger.info("PIA credentials saved")
         return SuccessResponse(message="PIA credentials saved successfully")
@@ -108,7 +124,7 @@ async def save_tailscale_api_key(api_key: TailscaleAPIKey) -> SuccessResponse:
         await SettingsDB.set("tailscale_api_key", api_key.api_key)
 
         # Log event
-        await ConnectionLogDB.add("config", "success", message="Tailscale API key saved")
+        ConnectionLogDB.add_nowait("config", "success", message="Tailscale API key saved")
 
         logger.info("Tailscale API key saved and validated")
         return SuccessResponse(message="Tailscale API key saved successfully")
@@ -139,50 +155,65 @@ async def get_tailscale_settings() -> Dict:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/regions")
+async def _load_regions() -> PIARegionList:
+    """Load regions from the database, fetching from the PIA API if empty.
+
+    Returns:
+        List of PIA regions
+    """
+    # Try to get from database first
+    regions = await PIARegionsDB.get_all()
+
+    if not regions:
+        # Fetch from PIA API and cache
+        pia_service = get_pia_service()
+        fresh_regions = await pia_service.fetch_server_list()
+
+        # Save to database
+        await PIARegionsDB.upsert_many(fresh_regions)
+
+        # Same rows we just stored, in the order get_all() returns them
+        regions = sorted(fresh_regions, key=lambda r: r["name"])
+
+    # Convert to response format (rows are already well-formed, so skip validation)
+    region_list = [
+        PIARegion.model_construct(
+            id=r["id"],
+            name=r["name"],
+            country=r["country"],
+            dns=r.get("dns"),
+            port_forward=bool(r["port_forward"]),
+            geo=bool(r["geo"])
+        )
+        for r in regions
+    ]
+
+    return PIARegionList(regions=region_list)
+
+
+@router.get("/regions", response_model=None)
 async def get_regions() -> PIARegionList:
     """Get list of available PIA regions.
 
     Returns:
         List of PIA regions
     """
-    try:
-        # Try to get from database first
-        regions = await PIARegionsDB.get_all()
-
-        if not regions:
-            # Fetch from PIA API and cache
-            pia_service = get_pia_service()
-            fresh_regions = await pia_service.fetch_server_list()
-
-            # Save to database
-            for region in fresh_regions:
-                await PIARegionsDB.upsert(
-                    region["id"],
-                    region["name"],
-                    region["country"],
-                    region["dns"],
-                    region["port_forward"],
-                    region["geo"],
-                    region["servers"]
-                )
+    global _regions_cache
 
-            regions = await PIARegionsDB.get_all()
+    cached = _regions_cache
+    if cached and time.monotonic() - cached[0] < REGIONS_CACHE_TTL:
+        return cached[1]
 
-        # Convert to response format
-        region_list = [
-            PIARegion(
-                id=r["id"],
-                name=r["name"],
-                country=r["country"],
-                dns=r.get("dns"),
-                port_forward=r["port_forward"],
-                geo=r["geo"]
-            )
-            for r in regions
-        ]
+    try:
+        async with _regions_cache_lock:
+            # Another request may have rebuilt the cache while we waited
+            cached = _regions_cache
+            if cached and time.monotonic() - cached[0] < REGIONS_CACHE_TTL:
+                return cached[1]
 
-        return PIARegionList(regions=region_list)
+            region_list = await _load_regions()
+            _regions_cache = (time.monotonic(), region_list)
+            return region_list
 
     except Exception as e:
         logger.error(f"Failed to get regions: {e}")
@@ -198,19 +229,12 @@ async def refresh_regions() -> SuccessResponse:
     """
     try:
         pia_service = get_pia_service()
-        regions = await pia_service.fetch_server_list()
+        regions = await pia_service.fetch_server_list(force=True)
 
         # Update database
-        for region in regions:
-            await PIARegionsDB.upsert(
-                region["id"],
-                region["name"],
-                region["country"],
-                region["dns"],
-                region["port_forward"],
-                region["geo"],
-                region["servers"]
-            )
+        await PIARegionsDB.upsert_many(regions)
+
+        _invalidate_regions_cache()
 
         logger.info(f"Refreshed {len(regions)} PIA regions")
         return SuccessResponse(message=f"Refreshed {len(regions)} regions")
@@ -257,7 +281,7 @@ async def select_region(selection: RegionSelect) -> SuccessResponse:
         await SettingsDB.set("selected_region", selection.region_id)
 
         # Log event
-        await ConnectionLogDB.add(
+        ConnectionLogDB.add_nowait(
             "region_change",
             "success",
             region_id=selection.region_id,
@@ -299,7 +323,7 @@ async def toggle_connection() -> Dict:
                 routing_service = get_routing_service()
                 await routing_service.cleanup_rules()
 
-                await ConnectionLogDB.add("disconnect", "success", message="Disconnected from PIA VPN")
+                ConnectionLogDB.add_nowait("disconnect", "success", message="Disconnected from PIA VPN")
                 logger.info("Disconnected from PIA VPN")
                 return {"action": "disconnect", "success": True, "connected": False}
             else:
@@ -320,7 +344,7 @@ async def toggle_connection() -> Dict:
                 await routing_service.enable_ip_forwarding()
                 await routing_service.setup_base_rules()
 
-                await ConnectionLogDB.add(
+                ConnectionLogDB.add_nowait(
                     "connect",
                     "success",
                     region_id=selected_region,
@@ -1,10 +1,15 @@
 """Status API router for system health and connection status."""
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 import logging
 import asyncio
 import json
+import time
 import httpx
+import orjson
+from typing import Optional
+from datetime import datetime
 
 from app.models import (
     PIAStatus,
@@ -15,19 +20,28 @@ from app.models import (
     SettingsDB,
     PIARegionsDB,
     ConnectionLogDB,
+    GeolocationCacheDB,
 )
 from app.services import (
     get_pia_service,
     get_tailscale_service,
     get_routing_service,
+    get_status_snapshotter,
 )
+from app.services.cache import async_ttl_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/status", tags=["status"])
 
+# How long geolocation lookups are cached (in memory and in the database)
+GEOLOCATION_CACHE_TTL = 24 * 3600
 
-@router.get("/pia")
+# Maximum number of geolocation lookups kept in memory (IPs come from the request path)
+GEOLOCATION_MEMORY_CACHE_SIZE = 256
+
+
+@router.get("/pia", response_model=None)
 async def get_pia_status() -> PIAStatus:
     """Get PIA VPN connection status.
 
@@ -65,53 +79,23 @@ async def get_pia_status() -> PIAStatus:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/vpn")
-async def get_vpn_status() -> dict:
+@router.get("/vpn", response_model=None)
+async def get_vpn_status() -> ORJSONResponse:
     """Get VPN connection status summary (all active connections).
 
     Returns:
         VPN status with active connection count and detailed connection info
     """
     try:
-        pia_service = get_pia_service()
-        active_connections = await pia_service.get_active_connections()
-
-        # Get detailed info for each active connection
-        connections = []
-        for conn in active_connections:
-            region_id = conn["region_id"]
-            interface = conn["interface"]
-
-            # Get region name
-            region = await PIARegionsDB.get_by_id(region_id)
-            region_name = region["name"] if region else region_id
-
-            # Get interface details (handshake time, transfer stats)
-            interface_details = await pia_service.get_interface_details(interface)
-
-            connections.append({
-                "region_id": region_id,
-                "region_name": region_name,
-                "interface": interface,
-                "endpoint_ip": interface_details.get("endpoint_ip"),
-                "last_handshake": interface_details.get("last_handshake", "N/A"),
-                "transfer_rx": interface_details.get("transfer_rx"),
-                "transfer_tx": interface_details.get("transfer_tx"),
-                "transfer_rx_bytes": interface_details.get("transfer_rx_bytes", 0),
-                "transfer_tx_bytes": interface_details.get("transfer_tx_bytes", 0)
-            })
-
-        return {
-            "active_count": len(connections),
-            "connections": connections
-        }
+        # The snapshot is plain JSON-ready data, so serialize it directly
+        return ORJSONResponse(await get_status_snapshotter().get_snapshot())
 
     except Exception as e:
         logger.error(f"Failed to get VPN status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/tailscale")
+@router.get("/tailscale", response_model=None)
 async def get_tailscale_status() -> TailscaleStatus:
     """Get Tailscale connection status.
 
@@ -137,7 +121,7 @@ async def get_tailscale_status() -> TailscaleStatus:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/health")
+@router.get("/health", response_model=None)
 async def get_system_health() -> SystemHealth:
     """Get overall system health check.
 
@@ -148,8 +132,15 @@ async def get_system_health() -> SystemHealth:
     healthy = True
 
     try:
+        # Run the independent checks concurrently
+        pia_credentials, snapshot, ts_status, ip_forwarding = await asyncio.gather(
+            SettingsDB.get_json("pia_credentials"),
+            get_status_snapshotter().get_snapshot(),
+            get_tailscale_service().get_local_status(),
+            get_routing_service().is_ip_forwarding_enabled()
+        )
+
         # Check PIA configuration
-        pia_credentials = await SettingsDB.get_json("pia_credentials")
         pia_configured = bool(pia_credentials)
 
         if not pia_configured:
@@ -157,16 +148,12 @@ async def get_system_health() -> SystemHealth:
             healthy = False
 
         # Check VPN connections (multi-region support)
-        pia_service = get_pia_service()
-        active_connections = await pia_service.get_active_connections()
-        vpn_connected = len(active_connections) > 0
+        vpn_connected = snapshot["active_count"] > 0
 
         if not vpn_connected:
             messages.append("No VPN connections active")
 
         # Check Tailscale
-        tailscale_service = get_tailscale_service()
-        ts_status = await tailscale_service.get_local_status()
         tailscale_running = ts_status["running"]
 
         if not tailscale_running:
@@ -174,9 +161,6 @@ async def get_system_health() -> SystemHealth:
             healthy = False
 
         # Check IP forwarding
-        routing_service = get_routing_service()
-        ip_forwarding = await routing_service.is_ip_forwarding_enabled()
-
         if not ip_forwarding:
             messages.append("IP forwarding not enabled")
             if vpn_connected:
@@ -207,29 +191,41 @@ async def get_system_health() -> SystemHealth:
         )
 
 
-@router.get("/logs")
-async def get_connection_logs(limit: int = 50, offset: int = 0) -> ConnectionLogList:
+@router.get("/logs", response_model=None)
+async def get_connection_logs(
+    limit: int = 50,
+    offset: int = 0,
+    before_id: Optional[int] = None
+) -> ConnectionLogList:
     """Get recent connection logs with pagination.
 
+    Pass ``before_id`` (the ``next_before_id`` of the previous page) to page
+    by log ID instead of offset; deep pages then cost the same as the first.
+
     Args:
         limit: Maximum number of log entries to return (default: 50)
-        offset: Number of entries to skip (default: 0)
+        offset: Number of entries to skip (default: 0, ignored when before_id is given)
+        before_id: Only return entries older than this log ID
 
     Returns:
         List of connection log entries with pagination metadata
     """
     try:
-        logs = await ConnectionLogDB.get_recent(limit, offset)
+        if before_id is not None:
+            logs = await ConnectionLogDB.get_recent_before(before_id, limit)
+        else:
+            logs = await ConnectionLogDB.get_recent(limit, offset)
         total = await ConnectionLogDB.get_count()
 
+        # Rows are already well-formed, so skip validation
         entries = [
-            ConnectionLogEntry(
+            ConnectionLogEntry.model_construct(
                 id=log["id"],
                 event_type=log["event_type"],
                 region_id=log.get("region_id"),
                 status=log["status"],
                 message=log.get("message"),
-                timestamp=log["timestamp"]
+                timestamp=datetime.fromisoformat(log["timestamp"])
             )
             for log in logs
         ]
@@ -238,7 +234,8 @@ async def get_connection_logs(limit: int = 50, offset: int = 0) -> ConnectionLog
             entries=entries,
             total=total,
             limit=limit,
-            offset=offset
+            offset=offset,
+            next_before_id=entries[-1].id if len(entries) == limit else None
         )
 
     except Exception as e:
@@ -246,30 +243,51 @@ async def get_connection_logs(limit: int = 50, offset: int = 0) -> ConnectionLog
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/geolocation/{ip}")
-async def get_geolocation(ip: str):
-    """Proxy geolocation requests to ipapi.co from server-side to avoid rate limiting.
+@async_ttl_cache(GEOLOCATION_CACHE_TTL, maxsize=GEOLOCATION_MEMORY_CACHE_SIZE)
+async def _lookup_geolocation(ip: str, client: httpx.AsyncClient) -> dict:
+    """Look up geolocation data for an IP, using the database cache before ipapi.co.
 
     Args:
         ip: IP address to geolocate
+        client: Shared HTTP client (app.state.http_client)
 
     Returns:
         Geolocation data from ipapi.co
     """
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"https://ipapi.co/{ip}/json/")
+    data = await GeolocationCacheDB.get(ip, GEOLOCATION_CACHE_TTL)
+    if data is not None:
+        return data
 
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Geolocation service unavailable")
+    response = await client.get(f"https://ipapi.co/{ip}/json/")
 
-            data = response.json()
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Geolocation service unavailable")
 
-            # Validate response
-            if not data.get("country_code") or "latitude" not in data or "longitude" not in data:
-                raise HTTPException(status_code=500, detail="Invalid geolocation data")
+    data = orjson.loads(response.content)
 
-            return data
+    # Validate response
+    if not data.get("country_code") or "latitude" not in data or "longitude" not in data:
+        raise HTTPException(status_code=500, detail="Invalid geolocation data")
+
+    await GeolocationCacheDB.set(ip, data)
+    return data
+
+
+@router.get("/geolocation/{ip}")
+async def get_geolocation(ip: str, request: Request):
+    """Proxy geolocation requests to ipapi.co from server-side to avoid rate limiting.
+
+    Results are cached for 24 hours, so repeated lookups of the same IP
+    don't hit ipapi.co.
+
+    Args:
+        ip: IP address to geolocate
+
+    Returns:
+        Geolocation data from ipapi.co
+    """
+    try:
+        return await _lookup_geolocation(ip, request.app.state.http_client)
 
     except httpx.TimeoutException:
         logger.error(f"Timeout fetching geolocation for {ip}")
@@ -279,6 +297,67 @@ async def get_geolocation(ip: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# WebSocket clients receiving VPN status updates from vpn_status_broadcaster
+connected_clients: set[WebSocket] = set()
+
+# Interval between VPN status broadcasts in seconds (2 samples/second)
+VPN_STATUS_BROADCAST_INTERVAL = 0.5
+
+
+async def _send_to_client(websocket: WebSocket, payload: str):
+    """Send an encoded status message to one WebSocket client, dropping it if the send fails.
+
+    Args:
+        websocket: Connected WebSocket client
+        payload: JSON-encoded status message
+    """
+    try:
+        await websocket.send_text(payload)
+    except Exception as e:
+        logger.debug(f"Dropping WebSocket client after failed send: {e}")
+        connected_clients.discard(websocket)
+
+
+async def vpn_status_broadcaster():
+    """Background task that streams VPN status to all connected WebSocket clients.
+
+    Computes one status snapshot per interval and sends it to every client,
+    so the cost of a tick doesn't grow with the number of open dashboards.
+    Idles without touching nmcli/wg while no clients are connected.
+    """
+    logger.info("Starting VPN status broadcaster...")
+
+    while True:
+        await asyncio.sleep(VPN_STATUS_BROADCAST_INTERVAL)
+
+        if not connected_clients:
+            continue
+
+        try:
+            snapshot = await get_status_snapshotter().get_snapshot()
+            message = {
+                "active_count": snapshot["active_count"],
+                "connections": snapshot["connections"],
+                "timestamp": time.monotonic()
+            }
+        except Exception as e:
+            logger.error(f"Error in VPN status broadcaster: {e}")
+            # Send error to clients but keep connections alive
+            message = {
+                "error": str(e),
+                "active_count": 0,
+                "connections": []
+            }
+
+        # Encode once per tick for all clients. Sent as a text frame because
+        # the dashboard JSON.parse()s event.data, which is a Blob for binary frames.
+        payload = orjson.dumps(message).decode()
+
+        await asyncio.gather(
+            *(_send_to_client(websocket, payload) for websocket in list(connected_clients))
+        )
+
+
 @router.websocket("/ws/vpn-status")
 async def websocket_vpn_status(websocket: WebSocket):
     """WebSocket endpoint for real-time VPN status streaming.
@@ -286,61 +365,18 @@ async def websocket_vpn_status(websocket: WebSocket):
     Sends VPN connection status updates every 500ms (2 samples/second) including:
     - Active connections with throughput data
     - Interface details (handshake, transfer stats)
+
+    Updates are pushed by vpn_status_broadcaster; this handler only registers
+    the client and waits for it to disconnect.
     """
     await websocket.accept()
+    connected_clients.add(websocket)
     logger.info("WebSocket client connected for VPN status streaming")
 
     try:
+        # Clients don't send anything; receiving just detects the disconnect
         while True:
-            try:
-                # Get VPN status with detailed connection info
-                pia_service = get_pia_service()
-                active_connections = await pia_service.get_active_connections()
-
-                # Get detailed info for each active connection
-                connections = []
-                for conn in active_connections:
-                    region_id = conn["region_id"]
-                    interface = conn["interface"]
-
-                    # Get region name
-                    region = await PIARegionsDB.get_by_id(region_id)
-                    region_name = region["name"] if region else region_id
-
-                    # Get interface details (handshake time, transfer stats)
-                    interface_details = await pia_service.get_interface_details(interface)
-
-                    connections.append({
-                        "region_id": region_id,
-                        "region_name": region_name,
-                        "interface": interface,
-                        "endpoint_ip": interface_details.get("endpoint_ip"),
-                        "last_handshake": interface_details.get("last_handshake", "N/A"),
-                        "transfer_rx": interface_details.get("transfer_rx"),
-                        "transfer_tx": interface_details.get("transfer_tx"),
-                        "transfer_rx_bytes": interface_details.get("transfer_rx_bytes", 0),
-                        "transfer_tx_bytes": interface_details.get("transfer_tx_bytes", 0)
-                    })
-
-                # Send data to client
-                await websocket.send_json({
-                    "active_count": len(connections),
-                    "connections": connections,
-                    "timestamp": asyncio.get_event_loop().time()
-                })
-
-                # Wait 500ms before next update (2 samples/second)
-                await asyncio.sleep(0.5)
-
-            except Exception as e:
-                logger.error(f"Error in WebSocket update loop: {e}")
-                # Send error to client but keep connection alive
-                await websocket.send_json({
-                    "error": str(e),
-                    "active_count": 0,
-                    "connections": []
-                })
-                await asyncio.sleep(0.5)
+            await websocket.receive_text()
 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
@@ -350,3 +386,5 @@ async def websocket_vpn_status(websocket: WebSocket):
             await websocket.close()
         except:
             pass
+    finally:
+        connected_clients.discard(websocket)
@@ -4,6 +4,7 @@ from .pia_service import PIAService, get_pia_service
 from .tailscale_service import TailscaleService, get_tailscale_service
 from .routing_service import RoutingService, get_routing_service
 from .tailscale_ssh_service import TailscaleSSHService, get_tailscale_ssh_service
+from .status_snapshot import StatusSnapshotter, get_status_snapshotter
 
 __all__ = [
     "PIAService",
@@ -14,4 +15,6 @@ __all__ = [
     "get_routing_service",
     "TailscaleSSHService",
     "get_tailscale_ssh_service",
+    "StatusSnapshotter",
+    "get_status_snapshotter",
 ]
@@ -0,0 +1,62 @@
+"""Async caching helpers for service methods."""
+
+import asyncio
+import functools
+import time
+from typing import Optional
+
+
+def _drop_failed_entry(entries: dict, key, entry, task: asyncio.Future):
+    """Remove a cache entry whose call failed or was cancelled."""
+    if task.cancelled() or task.exception() is not None:
+        if entries.get(key) is entry:
+            del entries[key]
+
+
+def _evict(entries: dict, maxsize: int, now: float):
+    """Make room for one entry: drop expired entries, then the oldest ones."""
+    for key in [key for key, entry in entries.items() if entry[0] <= now]:
+        del entries[key]
+    while len(entries) >= maxsize:
+        del entries[next(iter(entries))]
+
+
+def async_ttl_cache(ttl: float, maxsize: Optional[int] = None):
+    """Cache the result of an async function for ``ttl`` seconds.
+
+    Concurrent callers with the same arguments share one in-flight call
+    (single-flight), so a burst of requests triggers a single underlying
+    invocation. Failed calls are not cached. Cached results are shared
+    between callers and must not be modified.
+
+    The wrapped function exposes ``cache_clear()`` to drop all entries.
+
+    Args:
+        ttl: Time to live in seconds, measured from the start of the call
+        maxsize: Maximum number of entries (default: unbounded). Use it whenever
+            the arguments come from user input.
+    """
+    def decorator(func):
+        entries: dict = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+
+            entry = entries.get(key)
+            if entry is None or entry[0] <= now:
+                if maxsize is not None and key not in entries and len(entries) >= maxsize:
+                    _evict(entries, maxsize, now)
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                entry = (now + ttl, task)
+                entries[key] = entry
+                task.add_done_callback(functools.partial(_drop_failed_entry, entries, key, entry))
+
+            # Shield so one cancelled caller doesn't cancel the call for everyone else
+            return await asyncio.shield(entry[1])
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
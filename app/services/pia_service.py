@@ -1,14 +1,25 @@
 """PIA VPN service for WireGuard connection management."""
 
 import asyncio
+import base64
+import hashlib
+import os
 import httpx
-import json
+import orjson
+import re
 import subprocess
+import time
+import uuid
 from pathlib import Path
-from typing import Optional, Dict, List
+from functools import lru_cache
+from typing import Optional, Dict, List, Union
 from datetime import datetime
 import logging
 
+from nacl.public import PrivateKey
+
+from .cache import async_ttl_cache
+
 logger = logging.getLogger(__name__)
 
 PIA_SERVER_LIST_URL = "https://serverlist.piaservers.net/vpninfo/servers/v6"
@@ -16,6 +27,114 @@ PIA_TOKEN_URL = "https://www.privateinternetaccess.com/api/client/v2/token"
 WG_CONFIG_PATH = Path("/etc/wireguard/pia.conf")
 WG_INTERFACE = "pia"
 WG_INTERFACE_PREFIX = "pia-"  # Prefix for per-region interfaces
+PIA_TOKEN_TTL = 23 * 3600  # PIA tokens are valid for 24 hours; refresh an hour early
+
+# Regions provisioned at once by ensure_region_connections
+REGION_CONNECT_CONCURRENCY = 8
+
+# addKey fails fast on unreachable servers so the other auth method can be tried sooner
+PIA_ADDKEY_TIMEOUT = httpx.Timeout(8.0, connect=2.0, write=2.0, pool=1.0)
+
+# Per-region WireGuard keys and addKey results, reused when a region reconnects.
+# PIA drops peers that stay idle, so only fairly recent registrations are reused.
+WG_REGISTRATION_DIR = Path("/etc/wireguard")
+WG_REGISTRATION_MAX_AGE = 12 * 3600
+
+# `nmcli connection up` doesn't wait for a handshake, so connections using a
+# reused registration are polled this long for one before registering a new key
+WG_HANDSHAKE_TIMEOUT = 5.0
+WG_HANDSHAKE_POLL_INTERVAL = 0.5
+
+# The PIA server list changes on the order of hours
+SERVER_LIST_CACHE_TTL = 3600.0
+
+# Plain-text "what is my IP" services, queried concurrently (first answer wins)
+PUBLIC_IP_PROVIDERS = (
+    "https://api.ipify.org",
+    "https://ifconfig.co/ip",
+    "https://icanhazip.com",
+)
+PUBLIC_IP_CACHE_TTL = 10.0
+
+# Seconds to reuse the active connection list between status polls
+ACTIVE_CONNECTIONS_CACHE_TTL = 2.0
+ACTIVE_CONNECTION_NAMES_CACHE_TTL = 1.0
+
+WG_CONFIG_TEMPLATE = """[Interface]
+PrivateKey = {PrivateKey}
+Address = {Address}
+DNS = {DNS}
+
+[Peer]
+PublicKey = {PublicKey}
+Endpoint = {Endpoint}
+AllowedIPs = {AllowedIPs}
+PersistentKeepalive = {PersistentKeepalive}
+"""
+
+# "Key = value" lines of a WireGuard config that we carry over to NetworkManager
+WG_CONFIG_LINE_RE = re.compile(
+    r'^\s*(PrivateKey|Address|DNS|Endpoint|PublicKey|AllowedIPs|PersistentKeepalive)\s*=\s*(.+?)\s*$',
+    re.MULTILINE
+)
+
+# "<priority>: from all to <ip> lookup main" lines of `ip rule list`
+BYPASS_RULE_RE = re.compile(r'^(\d+):\s.*?\bto (\S+) lookup main\b', re.MULTILINE)
+
+# Seconds to trust the cached bypass rules before re-reading `ip rule list`
+BYPASS_RULES_CACHE_TTL = 60.0
+
+# Connection UUID in a NetworkManager keyfile
+NM_UUID_LINE_RE = re.compile(rb'^uuid=(\S+)$', re.MULTILINE)
+
+
+def _write_private_file(path: Path, data: bytes, owner: Optional[tuple[int, int]] = None):
+    """Atomically write a file holding secrets, readable by its owner only.
+
+    The data goes to a hidden temporary file next to ``path`` that is created
+    with mode 0600 and then renamed over ``path``, so readers (such as
+    NetworkManager) never see a partial file and the contents are never
+    exposed with looser permissions.
+
+    Args:
+        path: File to create or replace
+        data: File contents
+        owner: Optional (uid, gid) to give the file
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # A stale temporary file may have been left with other permissions
+            os.fchmod(fd, 0o600)
+            if owner is not None:
+                os.fchown(fd, *owner)
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+@lru_cache(maxsize=256)
+def _parse_servers(servers_json: str) -> Dict:
+    """Parse a region's stored servers JSON (memoized; the result must not be modified).
+
+    Region rows are cached and shared, so the same string object comes back for
+    every connect to a region and its hash is already computed.
+    """
+    return orjson.loads(servers_json)
+
+
+def _account_id(username: str) -> str:
+    """Identify a PIA account in persisted registrations without storing the username."""
+    return hashlib.sha256(username.encode()).hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _basic_auth(username: str, password: str) -> httpx.BasicAuth:
+    """Build PIA Basic Auth (memoized; httpx encodes the header once per instance)."""
+    return httpx.BasicAuth(username, password)
 
 
 class PIAService:
@@ -25,25 +144,79 @@ class PIAService:
         # NOTE: SSL verification disabled due to Python 3.13.5 + OpenSSL 3.5.1 compatibility issue
         # This is acceptable for homelab use with known PIA servers
         # Bind to container's eth0 IP to ensure traffic doesn't go through VPN interfaces
-        transport = httpx.AsyncHTTPTransport(local_address="10.36.0.102", verify=False)
+        # HTTP/2 is negotiated via ALPN and falls back to HTTP/1.1 where unsupported;
+        # with a custom transport it has to be enabled on the transport itself
+        transport = httpx.AsyncHTTPTransport(
+            local_address="10.36.0.102",
+            verify=False,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+        )
         self.client = httpx.AsyncClient(timeout=30.0, verify=False, transport=transport)
 
-        # Cache for get_active_connections to reduce CPU load
-        self._active_connections_cache = None
-        self._active_connections_cache_time = 0
-        self._cache_ttl = 2.0  # Cache for 2 seconds
+        # PIA's token endpoint may require proper SSL validation, so token requests
+        # use their own long-lived client with verification enabled
+        self.token_client = httpx.AsyncClient(
+            timeout=30.0,
+            verify=True,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+            headers={
+                "User-Agent": "curl/7.81.0"  # Mimic curl user agent
+            }
+        )
+
+        # Cached PIA auth token as (username, token, expires_at), also persisted in settings
+        self._auth_token: Optional[tuple[str, str, float]] = None
+        self._auth_token_lock = asyncio.Lock()
+
+        # Known VPN bypass rules as (server IPs, used priorities, read time)
+        self._bypass_rules: Optional[tuple[set[str], set[int], float]] = None
+        self._bypass_rules_lock = asyncio.Lock()
+
+        # Regions whose current config reuses a persisted registration
+        self._reused_registrations: set[str] = set()
 
     async def close(self):
-        """Close the HTTP client."""
+        """Close the HTTP clients."""
         await self.client.aclose()
+        await self.token_client.aclose()
+
+    async def _run(self, args: List[str], input: Optional[str] = None,
+                   check: bool = False) -> subprocess.CompletedProcess:
+        """Run a command without blocking the event loop.
+
+        Args:
+            args: Command and arguments
+            input: Text to send to the command's stdin
+            check: Raise CalledProcessError if the command fails
+
+        Returns:
+            Completed process with text stdout/stderr
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if input is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate(input.encode() if input is not None else None)
+        result = subprocess.CompletedProcess(args, proc.returncode, stdout.decode(), stderr.decode())
+
+        if check:
+            result.check_returncode()
+        return result
 
     def _invalidate_active_connections_cache(self):
         """Invalidate the active connections cache."""
-        self._active_connections_cache = None
-        self._active_connections_cache_time = 0
+        self._get_active_connection_names.cache_clear()
+        self._load_active_connections.cache_clear()
 
-    def _get_interface_name(self, region_id: str) -> str:
-        """Get WireGuard interface name for a region.
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _get_interface_name(region_id: str) -> str:
+        """Get WireGuard interface name for a region (memoized).
 
         Args:
             region_id: PIA region ID
@@ -63,8 +236,22 @@ class PIAService:
 
         return base_name
 
-    async def fetch_server_list(self) -> List[Dict]:
-        """Fetch PIA server list from API.
+    async def fetch_server_list(self, force: bool = False) -> List[Dict]:
+        """Fetch PIA server list from API (cached for an hour).
+
+        Args:
+            force: Bypass the cache and always query the API
+
+        Returns:
+            List of server regions with details (shared; must not be modified)
+        """
+        if force:
+            self._fetch_server_list.cache_clear()
+        return await self._fetch_server_list()
+
+    @async_ttl_cache(SERVER_LIST_CACHE_TTL)
+    async def _fetch_server_list(self) -> List[Dict]:
+        """Query the PIA server list API.
 
         Returns:
             List of server regions with details
@@ -74,35 +261,40 @@ class PIAService:
             response.raise_for_status()
 
             # PIA response format: JSON on first line, then signature
-            # Split on first newline and only parse the JSON part
-            response_text = response.text
-            json_part = response_text.split('\n')[0]
+            # Only parse the JSON part, straight from the raw bytes
+            raw = response.content
+            end = raw.find(b'\n')
+            json_part = raw[:end] if end != -1 else raw
 
             # Parse the JSON
-            data = json.loads(json_part)
+            data = orjson.loads(json_part)
             regions = data.get("regions", [])
 
-            parsed_regions = []
-            for region in regions:
-                # Only include regions that have WireGuard servers
-                servers = region.get("servers", {})
-                wg_servers = servers.get("wg", [])
-
-                if not wg_servers:
-                    logger.debug(f"Skipping region {region.get('id')} - no WireGuard servers")
-                    continue
-
-                parsed_regions.append({
+            # Only include regions that have WireGuard servers, and only keep the
+            # server fields generate_wireguard_params needs (stored per region row)
+            parsed_regions = [
+                {
                     "id": region.get("id"),
                     "name": region.get("name"),
                     "country": region.get("country"),
                     "dns": region.get("dns"),
                     "port_forward": region.get("port_forward", False),
                     "geo": region.get("geo", False),
-                    "servers": json.dumps(servers)
-                })
+                    "servers": orjson.dumps({
+                        "wg": [
+                            {"ip": server.get("ip"), "cn": server.get("cn")}
+                            for server in region["servers"]["wg"]
+                        ]
+                    }).decode()
+                }
+                for region in regions
+                if region.get("servers", {}).get("wg")
+            ]
+
+            if len(parsed_regions) < len(regions):
+                logger.debug("Skipped %d regions without WireGuard servers", len(regions) - len(parsed_regions))
 
-            logger.info(f"Fetched {len(parsed_regions)} PIA regions with WireGuard support")
+            logger.info("Fetched %d PIA regions with WireGuard support", len(parsed_regions))
             return parsed_regions
 
         except Exception as e:
@@ -112,6 +304,71 @@ class PIAService:
     async def get_auth_token(self, username: str, password: str) -> str:
         """Get PIA authentication token.
 
+        Tokens are cached in memory and in the settings table until shortly
+        before they expire, so only the first call per day hits the PIA API.
+
+        Args:
+            username: PIA username
+            password: PIA password
+
+        Returns:
+            Authentication token
+        """
+        cached = self._auth_token
+        if cached and cached[0] == username and cached[2] > time.time():
+            return cached[1]
+
+        async with self._auth_token_lock:
+            # Another task may have fetched a token while we waited for the lock
+            token = await self._get_cached_auth_token(username)
+            if token is not None:
+                return token
+
+            from app.models import SettingsDB
+
+            token = await self._request_auth_token(username, password)
+            expires_at = time.time() + PIA_TOKEN_TTL
+            self._auth_token = (username, token, expires_at)
+            await SettingsDB.set_json("pia_token", {
+                "username": username,
+                "token": token,
+                "expires_at": expires_at
+            })
+            return token
+
+    async def _get_cached_auth_token(self, username: str) -> Optional[str]:
+        """Get a still-valid PIA auth token from memory or the settings table.
+
+        Args:
+            username: PIA username the token must belong to
+
+        Returns:
+            Authentication token, or None if a new one has to be requested
+        """
+        cached = self._auth_token
+        if cached and cached[0] == username and cached[2] > time.time():
+            return cached[1]
+
+        from app.models import SettingsDB
+
+        stored = await SettingsDB.get_json("pia_token")
+        if stored and stored.get("username") == username and stored.get("expires_at", 0) > time.time():
+            self._auth_token = (username, stored["token"], stored["expires_at"])
+            return stored["token"]
+
+        return None
+
+    async def invalidate_auth_token(self):
+        """Drop the cached PIA auth token (e.g. after credentials change or a token is rejected)."""
+        from app.models import SettingsDB
+
+        self._auth_token = None
+        _basic_auth.cache_clear()
+        await SettingsDB.delete("pia_token")
+
+    async def _request_auth_token(self, username: str, password: str) -> str:
+        """Request a new PIA authentication token from the PIA API.
+
         Args:
             username: PIA username
             password: PIA password
@@ -120,70 +377,261 @@ class PIAService:
             Authentication token
         """
         try:
-            # Create a temporary client with SSL verification enabled for token request
-            # PIA's token endpoint may require proper SSL validation
-            async with httpx.AsyncClient(
-                timeout=30.0,
-                verify=True,  # Enable SSL verification for token endpoint
-                follow_redirects=True,
-                headers={
-                    "User-Agent": "curl/7.81.0"  # Mimic curl user agent
+            # Use multipart/form-data (curl --form equivalent)
+            response = await self.token_client.post(
+                PIA_TOKEN_URL,
+                files={
+                    "username": (None, username),
+                    "password": (None, password)
                 }
-            ) as token_client:
-                # Use multipart/form-data (curl --form equivalent)
-                response = await token_client.post(
-                    PIA_TOKEN_URL,
-                    files={
-                        "username": (None, username),
-                        "password": (None, password)
-                    }
-                )
-                response.raise_for_status()
+            )
+            response.raise_for_status()
 
-                data = response.json()
-                token = data.get("token")
+            data = orjson.loads(response.content)
+            token = data.get("token")
 
-                if not token:
-                    raise ValueError("No token in response")
+            if not token:
+                raise ValueError("No token in response")
 
-                logger.info("Successfully obtained PIA auth token")
-                return token
+            logger.info("Successfully obtained PIA auth token")
+            return token
 
         except Exception as e:
             logger.error(f"Failed to get PIA auth token: {e}")
             raise
 
-    def _generate_wireguard_keys(self) -> tuple[str, str]:
+    async def _add_key_with_basic_auth(self, server_ip: str, server_cn: str, username: str,
+                                       password: str, public_key: str) -> Dict:
+        """Register a WireGuard public key with a PIA server using Basic Auth.
+
+        Args:
+            server_ip: WireGuard server IP
+            server_cn: WireGuard server common name
+            username: PIA username
+            password: PIA password
+            public_key: Our WireGuard public key
+
+        Returns:
+            addKey response data
+        """
+        # Connect to IP address to bypass DNS issues
+        addkey_response = await self.client.get(
+            f"https://{server_ip}:1337/addKey",
+            params={"pubkey": public_key},
+            auth=_basic_auth(username, password),
+            headers={"Host": f"{server_cn}:1337"},
+            timeout=PIA_ADDKEY_TIMEOUT
+        )
+        addkey_response.raise_for_status()
+        return orjson.loads(addkey_response.content)
+
+    async def _add_key_with_token(self, server_ip: str, server_cn: str, token: str,
+                                  public_key: str) -> Dict:
+        """Register a WireGuard public key with a PIA server using an auth token.
+
+        Args:
+            server_ip: WireGuard server IP
+            server_cn: WireGuard server common name
+            token: PIA auth token
+            public_key: Our WireGuard public key
+
+        Returns:
+            addKey response data
+        """
+        # Connect to IP address but set Host header for proper routing
+        addkey_response = await self.client.get(
+            f"https://{server_ip}:1337/addKey",
+            params={
+                "pt": token,
+                "pubkey": public_key
+            },
+            headers={"Host": f"{server_cn}:1337"},
+            timeout=PIA_ADDKEY_TIMEOUT
+        )
+        addkey_response.raise_for_status()
+        return orjson.loads(addkey_response.content)
+
+    def _registration_path(self, region_id: str) -> Path:
+        """Get the file holding the persisted WireGuard registration for a region."""
+        return WG_REGISTRATION_DIR / f"{WG_INTERFACE_PREFIX}{region_id}.json"
+
+    def _load_registration(self, region_id: str, server_ip: str, username: str) -> Optional[Dict]:
+        """Load a persisted WireGuard registration that can still be reused.
+
+        Args:
+            region_id: PIA region ID
+            server_ip: WireGuard server the new connection will use
+            username: PIA username the new connection will use
+
+        Returns:
+            Registration dict, or None if missing, expired, or for another server or account
+        """
+        try:
+            registration = orjson.loads(self._registration_path(region_id).read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable WireGuard registration for {region_id}: {e}")
+            return None
+
+        if registration.get("server_ip") != server_ip:
+            return None
+        if registration.get("account") != _account_id(username):
+            return None
+        if time.time() - registration.get("registered_at", 0) > WG_REGISTRATION_MAX_AGE:
+            return None
+
+        return registration
+
+    def _save_registration(self, region_id: str, registration: Dict):
+        """Persist a WireGuard registration (including the private key) for reuse.
+
+        Args:
+            region_id: PIA region ID
+            registration: Private key and addKey results
+        """
+        try:
+            WG_REGISTRATION_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path = self._registration_path(region_id)
+            _write_private_file(path, orjson.dumps(registration))
+        except OSError as e:
+            logger.warning(f"Could not persist WireGuard registration for {region_id}: {e}")
+
+    def _forget_registration(self, region_id: str):
+        """Delete the persisted WireGuard registration for a region.
+
+        Args:
+            region_id: PIA region ID
+        """
+        self._reused_registrations.discard(region_id)
+        self._registration_path(region_id).unlink(missing_ok=True)
+
+    async def _generate_wireguard_keys(self) -> tuple[str, str]:
         """Generate WireGuard private and public keys.
 
         Returns:
             Tuple of (private_key, public_key)
         """
-        try:
-            # Generate private key
-            result = subprocess.run(
-                ["wg", "genkey"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            private_key = result.stdout.strip()
-
-            # Generate public key from private key
-            result = subprocess.run(
-                ["wg", "pubkey"],
-                input=private_key,
-                capture_output=True,
-                text=True,
-                check=True
+        # Curve25519 keypair in-process, encoded the same way as `wg genkey`/`wg pubkey`
+        private = PrivateKey.generate()
+        private_key = base64.b64encode(bytes(private)).decode()
+        public_key = base64.b64encode(bytes(private.public_key)).decode()
+        return private_key, public_key
+
+    async def _register_wireguard_key(self, server_ip: str, server_cn: str, username: str,
+                                      password: str, public_key: str) -> Dict:
+        """Register a WireGuard public key with a PIA server via /addKey.
+
+        Args:
+            server_ip: WireGuard server IP
+            server_cn: WireGuard server common name
+            username: PIA username
+            password: PIA password
+            public_key: Our WireGuard public key
+
+        Returns:
+            Validated addKey response data (server_key, peer_ip, server_port, dns_servers)
+        """
+        # Call PIA's /addKey endpoint to register our public key and get server details
+        # Try two authentication methods:
+        # 1. Token-based (official method, requires token API access)
+        # 2. Basic Auth with username/password (fallback for blocked networks)
+        logger.info("Registering with PIA WireGuard server %s (%s)", server_cn, server_ip)
+
+        addkey_data = None
+        auth_method = None
+        token_error = None
+        basic_error = None
+
+        token = await self._get_cached_auth_token(username)
+        token_task = None
+
+        if token is None:
+            # No usable token yet: request one in the background while trying Basic Auth,
+            # so a cold start doesn't pay for the token round trip before registering
+            token_task = asyncio.create_task(self.get_auth_token(username, password))
+            # Failures are reported when awaited below; don't warn if Basic Auth wins
+            token_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+            try:
+                logger.info("No cached token, attempting Basic Auth while requesting one")
+                addkey_data = await self._add_key_with_basic_auth(
+                    server_ip, server_cn, username, password, public_key
+                )
+                auth_method = "basic"
+                logger.info("Basic Auth authentication successful")
+            except Exception as e:
+                basic_error = e
+                logger.warning(f"Basic Auth authentication failed: {e}")
+
+        # Method 1: Try token-based authentication
+        if addkey_data is None:
+            try:
+                logger.info("Attempting token-based authentication")
+                if token is None:
+                    token = await token_task
+
+                try:
+                    addkey_data = await self._add_key_with_token(server_ip, server_cn, token, public_key)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in (401, 403):
+                        raise
+
+                    # The cached token was rejected; retry once with a fresh one
+                    logger.info("PIA auth token rejected, requesting a new one")
+                    await self.invalidate_auth_token()
+                    token = await self.get_auth_token(username, password)
+                    addkey_data = await self._add_key_with_token(server_ip, server_cn, token, public_key)
+
+                auth_method = "token"
+                logger.info("Token-based authentication successful")
+
+            except Exception as e:
+                token_error = e
+                logger.warning(f"Token-based authentication failed: {e}")
+
+        # Method 2: Try Basic Auth directly with WireGuard server (unless already tried)
+        if addkey_data is None and basic_error is None:
+            logger.info("Falling back to direct Basic Auth")
+            try:
+                addkey_data = await self._add_key_with_basic_auth(
+                    server_ip, server_cn, username, password, public_key
+                )
+                auth_method = "basic"
+                logger.info("Basic Auth authentication successful")
+            except Exception as e:
+                basic_error = e
+
+        if addkey_data is None:
+            logger.error(f"PIA addKey failed with both methods: {basic_error}")
+            raise Exception(
+                f"Both authentication methods failed. "
+                f"Token error: {token_error}. Basic Auth error: {basic_error}"
             )
-            public_key = result.stdout.strip()
 
-            return private_key, public_key
+        # Validate response
+        if not addkey_data:
+            raise ValueError("Failed to authenticate with PIA server")
 
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to generate WireGuard keys: {e}")
-            raise
+        if addkey_data.get("status") != "OK":
+            raise ValueError(f"PIA addKey returned non-OK status: {addkey_data}")
+
+        # Check the server details we need from the response
+        server_public_key = addkey_data.get("server_key")
+        peer_ip = addkey_data.get("peer_ip")
+
+        if not server_public_key:
+            raise ValueError(f"No server_key in addKey response: {addkey_data}")
+
+        if not peer_ip:
+            raise ValueError(f"No peer_ip in addKey response: {addkey_data}")
+
+        logger.info(
+            "Successfully registered with PIA server using %s auth, assigned IP: %s",
+            auth_method, peer_ip
+        )
+
+        return addkey_data
 
     async def generate_wireguard_config(
         self,
@@ -203,12 +651,35 @@ class PIAService:
         Returns:
             WireGuard configuration content
         """
-        try:
-            # Generate WireGuard keys
-            private_key, public_key = self._generate_wireguard_keys()
+        params = await self.generate_wireguard_params(region_id, region_data, username, password)
+        return WG_CONFIG_TEMPLATE.format_map(params)
+
+    async def generate_wireguard_params(
+        self,
+        region_id: str,
+        region_data: Dict,
+        username: str,
+        password: str
+    ) -> Dict[str, str]:
+        """Generate WireGuard configuration values for a region.
+
+        A recent registration for the same server is reused, which skips key
+        generation and the /addKey round trip on reconnects.
+
+        Args:
+            region_id: PIA region ID
+            region_data: Region data from database
+            username: PIA username
+            password: PIA password
 
+        Returns:
+            Config values keyed like the WireGuard config file (PrivateKey, Address, ...)
+        """
+        try:
             # Parse servers data
-            servers = json.loads(region_data.get("servers", "{}"))
+            servers = region_data.get("servers", "{}")
+            if isinstance(servers, str):
+                servers = _parse_servers(servers)
             wg_servers = servers.get("wg", [])
 
             if not wg_servers:
@@ -222,224 +693,176 @@ class PIAService:
             if not server_ip or not server_cn:
                 raise ValueError(f"No server IP or CN found for region {region_id}")
 
-            # Call PIA's /addKey endpoint to register our public key and get server details
-            # Try two authentication methods:
-            # 1. Token-based (official method, requires token API access)
-            # 2. Basic Auth with username/password (fallback for blocked networks)
-            logger.info(f"Registering with PIA WireGuard server {server_cn} ({server_ip})")
-
-            addkey_data = None
-            auth_method = None
+            registration = self._load_registration(region_id, server_ip, username)
 
-            # Method 1: Try token-based authentication
-            try:
-                logger.info("Attempting token-based authentication")
-                token = await self.get_auth_token(username, password)
-
-                # Connect to IP address but set Host header for proper routing
-                addkey_response = await self.client.get(
-                    f"https://{server_ip}:1337/addKey",
-                    params={
-                        "pt": token,
-                        "pubkey": public_key
-                    },
-                    headers={"Host": f"{server_cn}:1337"},
-                    timeout=10.0
+            if registration:
+                logger.info("Reusing WireGuard registration for region %s", region_id)
+                self._reused_registrations.add(region_id)
+            else:
+                # Generate WireGuard keys and register the public key with PIA
+                private_key, public_key = await self._generate_wireguard_keys()
+                addkey_data = await self._register_wireguard_key(
+                    server_ip, server_cn, username, password, public_key
                 )
-                addkey_response.raise_for_status()
-                addkey_data = addkey_response.json()
-                auth_method = "token"
-                logger.info("Token-based authentication successful")
 
-            except Exception as e:
-                logger.warning(f"Token-based authentication failed: {e}")
-                logger.info("Falling back to direct Basic Auth")
-
-                # Method 2: Try Basic Auth directly with WireGuard server
-                # Connect to IP address to bypass DNS issues
-                try:
-                    addkey_response = await self.client.get(
-                        f"https://{server_ip}:1337/addKey",
-                        params={"pubkey": public_key},
-                        auth=(username, password),
-                        headers={"Host": f"{server_cn}:1337"},
-                        timeout=10.0
-                    )
-                    addkey_response.raise_for_status()
-                    addkey_data = addkey_response.json()
-                    auth_method = "basic"
-                    logger.info("Basic Auth authentication successful")
-
-                except Exception as e2:
-                    logger.error(f"Basic Auth also failed: {e2}")
-                    raise Exception(
-                        f"Both authentication methods failed. "
-                        f"Token error: {e}. Basic Auth error: {e2}"
-                    )
-
-            # Validate response
-            if not addkey_data:
-                raise ValueError("Failed to authenticate with PIA server")
-
-            if addkey_data.get("status") != "OK":
-                raise ValueError(f"PIA addKey returned non-OK status: {addkey_data}")
-
-            # Extract server details from response
-            server_public_key = addkey_data.get("server_key")
-            peer_ip = addkey_data.get("peer_ip")
-            server_port = addkey_data.get("server_port", 1337)
-            dns_servers = addkey_data.get("dns_servers", [])
-
-            if not server_public_key:
-                raise ValueError(f"No server_key in addKey response: {addkey_data}")
-
-            if not peer_ip:
-                raise ValueError(f"No peer_ip in addKey response: {addkey_data}")
-
-            logger.info(
-                f"Successfully registered with PIA server using {auth_method} auth, "
-                f"assigned IP: {peer_ip}"
-            )
-
-            # Use endpoint from response or fallback
-            endpoint = f"{server_ip}:{server_port}"
+                registration = {
+                    "server_ip": server_ip,
+                    "account": _account_id(username),
+                    "private_key": private_key,
+                    "server_key": addkey_data["server_key"],
+                    "peer_ip": addkey_data["peer_ip"],
+                    "server_port": addkey_data.get("server_port", 1337),
+                    "dns_servers": addkey_data.get("dns_servers", []),
+                    "registered_at": time.time()
+                }
+                self._save_registration(region_id, registration)
+                self._reused_registrations.discard(region_id)
 
             # Use DNS servers from response, fallback to region data or PIA defaults
-            if dns_servers:
-                dns_setting = ",".join(dns_servers)
+            if registration["dns_servers"]:
+                dns_setting = ",".join(registration["dns_servers"])
             else:
                 dns_setting = region_data.get("dns", "209.222.18.222,209.222.18.218")
 
-            # Generate config using values from PIA's addKey response
-            config = f"""[Interface]
-PrivateKey = {private_key}
-Address = {peer_ip}
-DNS = {dns_setting}
-
-[Peer]
-PublicKey = {server_public_key}
-Endpoint = {endpoint}
-AllowedIPs = 0.0.0.0/0
-PersistentKeepalive = 25
-"""
+            # Config values from PIA's addKey response, keyed like the WireGuard config file
+            params = {
+                "PrivateKey": registration["private_key"],
+                "Address": registration["peer_ip"],
+                "DNS": dns_setting,
+                "PublicKey": registration["server_key"],
+                "Endpoint": f"{server_ip}:{registration['server_port']}",
+                "AllowedIPs": "0.0.0.0/0",
+                "PersistentKeepalive": "25"
+            }
 
-            logger.info(f"Generated WireGuard config for region {region_id}")
-            return config
+            logger.info("Generated WireGuard config for region %s", region_id)
+            return params
 
         except Exception as e:
             logger.error(f"Failed to generate WireGuard config: {e}")
             raise
 
-    async def write_wireguard_config(self, config: str, region_id: str):
+    async def write_wireguard_config(self, config: Union[str, Dict[str, str]], region_id: str,
+                                     reload: bool = True) -> bool:
         """Create/update WireGuard connection in NetworkManager.
 
         Args:
-            config: WireGuard configuration content
+            config: WireGuard configuration content, or the values from
+                generate_wireguard_params (skips parsing)
             region_id: PIA region ID for interface naming
+            reload: Reload NetworkManager afterwards (callers writing several
+                configs can reload once themselves)
+
+        Returns:
+            True if the connection file changed, False if it was already up to date
         """
         try:
             # Parse config to extract key parameters
-            private_key = None
-            address = None
-            dns = None
-            endpoint = None
-            public_key = None
-            allowed_ips = None
-            keepalive = None
-
-            for line in config.split('\n'):
-                line = line.strip()
-                if line.startswith('PrivateKey'):
-                    private_key = line.split('=', 1)[1].strip()
-                elif line.startswith('Address'):
-                    address = line.split('=', 1)[1].strip()
-                elif line.startswith('DNS'):
-                    dns = line.split('=', 1)[1].strip()
-                elif line.startswith('Endpoint'):
-                    endpoint = line.split('=', 1)[1].strip()
-                elif line.startswith('PublicKey'):
-                    public_key = line.split('=', 1)[1].strip()
-                elif line.startswith('AllowedIPs'):
-                    allowed_ips = line.split('=', 1)[1].strip()
-                elif line.startswith('PersistentKeepalive'):
-                    keepalive = line.split('=', 1)[1].strip()
+            if isinstance(config, dict):
+                params = config
+            else:
+                params = dict(WG_CONFIG_LINE_RE.findall(config))
+            private_key = params.get("PrivateKey")
+            address = params.get("Address")
+            dns = params.get("DNS")
+            endpoint = params.get("Endpoint")
+            public_key = params.get("PublicKey")
+            allowed_ips = params.get("AllowedIPs")
+            keepalive = params.get("PersistentKeepalive")
 
             if not all([private_key, address, endpoint, public_key]):
                 raise ValueError("Missing required WireGuard parameters")
 
             # Get interface name for this region
             interface_name = self._get_interface_name(region_id)
+            nm_conn_path = Path(f"/etc/NetworkManager/system-connections/{interface_name}.nmconnection")
 
-            # Generate UUID for connection
-            import uuid
-            conn_uuid = str(uuid.uuid4())
+            try:
+                existing = nm_conn_path.read_bytes()
+            except FileNotFoundError:
+                existing = None
+
+            # Keep the UUID of an existing connection so unchanged configs produce identical files
+            uuid_match = NM_UUID_LINE_RE.search(existing) if existing else None
+            if uuid_match:
+                conn_uuid = uuid_match.group(1).decode()
+            else:
+                conn_uuid = str(uuid.uuid4())
 
             # Create NetworkManager keyfile format configuration
             # DNS is configured to prevent leaks to local/ISP DNS servers
             # DNS queries will be sent through the VPN tunnel to PIA's DNS servers
             # High priority (50) ensures VPN DNS is used over system DNS (100)
-            nm_config = f"""[connection]
-id={interface_name}
-uuid={conn_uuid}
-type=wireguard
-interface-name={interface_name}
-
-[wireguard]
-private-key={private_key}
-
-[wireguard-peer.{public_key}]
-endpoint={endpoint}
-allowed-ips={allowed_ips};
-persistent-keepalive={keepalive}
-
-[ipv4]
-address1={address}
-dns={dns}
-dns-priority=50
-ignore-auto-dns=yes
-method=manual
-never-default=yes
-
-[ipv6]
-addr-gen-mode=default
-method=disabled
-
-[proxy]
-"""
-
-            # Write configuration to NetworkManager system-connections directory
-            nm_conn_path = Path(f"/etc/NetworkManager/system-connections/{interface_name}.nmconnection")
+            lines = [
+                "[connection]",
+                f"id={interface_name}",
+                f"uuid={conn_uuid}",
+                "type=wireguard",
+                f"interface-name={interface_name}",
+                "",
+                "[wireguard]",
+                f"private-key={private_key}",
+                "",
+                f"[wireguard-peer.{public_key}]",
+                f"endpoint={endpoint}",
+                f"allowed-ips={allowed_ips};",
+            ]
+            if keepalive:
+                lines.append(f"persistent-keepalive={keepalive}")
+
+            lines += ["", "[ipv4]", f"address1={address}"]
+            if dns:
+                lines.append(f"dns={dns}")
+            lines += [
+                "dns-priority=50",
+                "ignore-auto-dns=yes",
+                "method=manual",
+                "never-default=yes",
+                "",
+                "[ipv6]",
+                "addr-gen-mode=default",
+                "method=disabled",
+                "",
+                "[proxy]",
+                "",
+            ]
+            nm_config = "\n".join(lines).encode()
+
+            if nm_config == existing:
+                # Nothing changed, so NetworkManager doesn't need to re-read its connections
+                logger.info(f"NetworkManager configuration for {interface_name} is unchanged")
+                return False
 
             # Ensure NetworkManager directory exists
             nm_conn_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Write the configuration
-            nm_conn_path.write_text(nm_config)
-
-            # Set correct permissions and ownership (NetworkManager requires 0600 and root:root)
-            nm_conn_path.chmod(0o600)
-            import os
-            os.chown(nm_conn_path, 0, 0)  # Ensure file is owned by root:root
+            # Write the configuration with correct permissions and ownership
+            # (NetworkManager requires 0600 and root:root)
+            _write_private_file(nm_conn_path, nm_config, owner=(0, 0))
 
             logger.info(f"Wrote NetworkManager WireGuard configuration for {interface_name} to {nm_conn_path}")
 
-            # Reload NetworkManager to pick up the new connection
-            subprocess.run(
-                ["nmcli", "connection", "reload"],
-                check=True,
-                capture_output=True
-            )
-            logger.info("Reloaded NetworkManager connections")
+            if reload:
+                await self._reload_connections()
 
-            # Give NetworkManager time to process the new connection
-            import time
-            time.sleep(1)
+            return True
 
         except Exception as e:
             logger.error(f"Failed to configure WireGuard in NetworkManager: {e}")
             raise
 
-    def _add_server_bypass_rule(self, server_ip: str) -> bool:
+    async def _reload_connections(self):
+        """Reload NetworkManager so it picks up new or changed connection files."""
+        await self._run(
+            ["nmcli", "connection", "reload"],
+            check=True
+        )
+        logger.info("Reloaded NetworkManager connections")
+
+        # Give NetworkManager time to process the new connection
+        await asyncio.sleep(1)
+
+    async def _add_server_bypass_rule(self, server_ip: str) -> bool:
         """Add routing rule to bypass VPN for traffic to PIA server itself.
 
         This prevents a routing loop where WireGuard traffic to the PIA server
@@ -451,56 +874,85 @@ method=disabled
         Returns:
             True if rule added successfully
         """
-        try:
-            # Check if rule already exists
-            result = subprocess.run(
-                ["ip", "rule", "list"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+        return await self._add_server_bypass_rules([server_ip])
+
+    async def _add_server_bypass_rules(self, server_ips: List[str]) -> bool:
+        """Add VPN bypass routing rules for several PIA servers at once.
+
+        Existing rules come from a cached `ip rule list` read, and all
+        missing rules are added in a single `ip -batch` invocation.
+
+        Args:
+            server_ips: PIA server IP addresses
+
+        Returns:
+            True if all rules exist afterwards
+        """
+        # Serialized so concurrent connects never pick the same priority
+        async with self._bypass_rules_lock:
+            try:
+                if (self._bypass_rules is None or
+                        time.monotonic() - self._bypass_rules[2] > BYPASS_RULES_CACHE_TTL):
+                    self._bypass_rules = await self._read_bypass_rules()
+                bypassed, used_priorities, _ = self._bypass_rules
+
+                commands = []
+                for server_ip in dict.fromkeys(server_ips):
+                    if server_ip in bypassed:
+                        logger.debug(f"Bypass rule for {server_ip} already exists")
+                        continue
+
+                    # Find first available priority
+                    priority = 50
+                    while priority in used_priorities and priority < 100:
+                        priority += 1
+
+                    if priority >= 100:
+                        logger.warning("No available priority slots for bypass rules (50-99 full)")
+                        priority = 50  # Reuse, will update existing rule
+
+                    used_priorities.add(priority)
+                    bypassed.add(server_ip)
+                    commands.append(f"rule add to {server_ip} lookup main priority {priority}")
+                    logger.info(f"Adding routing bypass rule for PIA server {server_ip} at priority {priority}")
+
+                if commands:
+                    # Add all routing rules to bypass VPN for these servers in one go
+                    await self._run(
+                        ["ip", "-batch", "-"],
+                        input="\n".join(commands) + "\n",
+                        check=True
+                    )
 
-            if f"to {server_ip} lookup main" in result.stdout:
-                logger.debug(f"Bypass rule for {server_ip} already exists")
                 return True
 
-            # Find the lowest available priority between 50-99
-            # We use this range to ensure these rules take precedence over VPN routing
-            used_priorities = []
-            for line in result.stdout.split('\n'):
-                if 'lookup main' in line and 'to ' in line:
-                    parts = line.split(':')
-                    if parts:
-                        try:
-                            priority = int(parts[0])
-                            if 50 <= priority <= 99:
-                                used_priorities.append(priority)
-                        except ValueError:
-                            pass
-
-            # Find first available priority
-            priority = 50
-            while priority in used_priorities and priority < 100:
-                priority += 1
-
-            if priority >= 100:
-                logger.warning("No available priority slots for bypass rules (50-99 full)")
-                priority = 50  # Reuse, will update existing rule
-
-            # Add routing rule to bypass VPN for this server
-            subprocess.run(
-                ["ip", "rule", "add", "to", server_ip, "lookup", "main", "priority", str(priority)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            except subprocess.CalledProcessError as e:
+                # Re-read the rules next time instead of trusting a partial update
+                self._bypass_rules = None
+                logger.error(f"Failed to add bypass rules for {', '.join(server_ips)}: {e.stderr}")
+                return False
 
-            logger.info(f"Added routing bypass rule for PIA server {server_ip} at priority {priority}")
-            return True
+    async def _read_bypass_rules(self) -> tuple[set[str], set[int], float]:
+        """Read the existing VPN bypass rules from `ip rule list`.
 
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to add bypass rule for {server_ip}: {e.stderr}")
-            return False
+        Returns:
+            Tuple of (bypassed server IPs, used priorities between 50-99, read time)
+        """
+        result = await self._run(
+            ["ip", "rule", "list"],
+            check=True
+        )
+
+        bypassed = set()
+        used_priorities = set()
+
+        # We use priorities 50-99 to ensure these rules take precedence over VPN routing
+        for priority, server_ip in BYPASS_RULE_RE.findall(result.stdout):
+            bypassed.add(server_ip)
+            if 50 <= int(priority) <= 99:
+                used_priorities.add(int(priority))
+
+        return bypassed, used_priorities, time.monotonic()
 
     async def connect_region(self, region_id: str) -> bool:
         """Connect to PIA VPN for a specific region via NetworkManager.
@@ -515,28 +967,18 @@ method=disabled
             interface_name = self._get_interface_name(region_id)
 
             # Enable IP forwarding
-            subprocess.run(
+            await self._run(
                 ["sysctl", "-w", "net.ipv4.ip_forward=1"],
-                check=True,
-                capture_output=True
-            )
-
-            # Bring up WireGuard connection via NetworkManager
-            result = subprocess.run(
-                ["nmcli", "connection", "up", interface_name],
-                capture_output=True,
-                text=True,
                 check=True
             )
 
-            logger.info(f"PIA VPN connected to {region_id} via NetworkManager: {result.stdout}")
+            if not await self._bring_up_region(region_id):
+                return False
 
             # Get server IP from WireGuard interface to add bypass rule
             try:
-                wg_show = subprocess.run(
+                wg_show = await self._run(
                     ["wg", "show", interface_name, "endpoints"],
-                    capture_output=True,
-                    text=True,
                     check=True
                 )
 
@@ -547,20 +989,79 @@ method=disabled
                         if ':' in endpoint:
                             server_ip = endpoint.split(':')[0]
                             # Add routing bypass rule for this server
-                            self._add_server_bypass_rule(server_ip)
+                            await self._add_server_bypass_rule(server_ip)
                             break
 
             except Exception as e:
                 logger.warning(f"Could not add bypass rule for {region_id}: {e}")
 
+            return True
+
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to connect PIA VPN to {region_id}: {e.stderr}")
+            return False
+
+    async def _bring_up_region(self, region_id: str) -> bool:
+        """Bring up a region's WireGuard connection via NetworkManager.
+
+        Connections using a reused registration only count as connected once
+        the server completes a handshake, since PIA may have dropped the peer.
+
+        Args:
+            region_id: PIA region ID
+
+        Returns:
+            True if connection successful
+        """
+        try:
+            interface_name = self._get_interface_name(region_id)
+            started = time.time()
+            result = await self._run(
+                ["nmcli", "connection", "up", interface_name],
+                check=True
+            )
+
+            logger.info(f"PIA VPN connected to {region_id} via NetworkManager: {result.stdout}")
+
             # Invalidate cache since connection state changed
             self._invalidate_active_connections_cache()
+
+            if region_id in self._reused_registrations:
+                if not await self._wait_for_handshake(interface_name, since=started):
+                    logger.warning(f"No WireGuard handshake for {region_id} with a reused registration")
+                    return False
+
             return True
 
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to connect PIA VPN to {region_id}: {e.stderr}")
             return False
 
+    async def _wait_for_handshake(self, interface_name: str, since: float,
+                                  timeout: float = WG_HANDSHAKE_TIMEOUT) -> bool:
+        """Wait for a WireGuard handshake on an interface.
+
+        Args:
+            interface_name: WireGuard interface name
+            since: Unix time the handshake must not be older than
+            timeout: Seconds to wait for the handshake
+
+        Returns:
+            True if a peer completed a handshake in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            result = await self._run(["wg", "show", interface_name, "latest-handshakes"])
+            if result.returncode == 0:
+                for line in result.stdout.splitlines():
+                    fields = line.split("\t")
+                    if len(fields) == 2 and int(fields[1]) >= int(since):
+                        return True
+
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(WG_HANDSHAKE_POLL_INTERVAL)
+
     async def disconnect_region(self, region_id: str) -> bool:
         """Disconnect from PIA VPN for a specific region via NetworkManager and delete the connection.
 
@@ -574,18 +1075,14 @@ method=disabled
             interface_name = self._get_interface_name(region_id)
 
             # First disconnect if active
-            result = subprocess.run(
+            result = await self._run(
                 ["nmcli", "connection", "down", interface_name],
-                capture_output=True,
-                text=True,
                 check=False  # Don't fail if not active
             )
 
             # Then delete the connection configuration
-            result = subprocess.run(
+            result = await self._run(
                 ["nmcli", "connection", "delete", interface_name],
-                capture_output=True,
-                text=True,
                 check=False  # Don't fail if doesn't exist
             )
 
@@ -607,17 +1104,14 @@ method=disabled
         """
         try:
             # Enable IP forwarding
-            subprocess.run(
+            await self._run(
                 ["sysctl", "-w", "net.ipv4.ip_forward=1"],
-                check=True,
-                capture_output=True
+                check=True
             )
 
             # Bring up WireGuard connection via NetworkManager
-            result = subprocess.run(
+            result = await self._run(
                 ["nmcli", "connection", "up", WG_INTERFACE],
-                capture_output=True,
-                text=True,
                 check=True
             )
 
@@ -638,10 +1132,8 @@ method=disabled
             True if disconnection successful
         """
         try:
-            result = subprocess.run(
+            result = await self._run(
                 ["nmcli", "connection", "down", WG_INTERFACE],
-                capture_output=True,
-                text=True,
                 check=True
             )
 
@@ -670,14 +1162,7 @@ method=disabled
         """
         try:
             # Check if connection is active
-            result = subprocess.run(
-                ["nmcli", "connection", "show", "--active"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            is_active = WG_INTERFACE in result.stdout
+            is_active = WG_INTERFACE in await self._get_active_connection_names()
 
             if not is_active:
                 return {
@@ -688,13 +1173,9 @@ method=disabled
                     "transfer": None
                 }
 
-            # Get detailed connection info
-            detail_result = subprocess.run(
-                ["nmcli", "connection", "show", WG_INTERFACE],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            # Peer endpoint and WireGuard stats, from one `wg show all dump`
+            # (optional; get_all_interface_details returns {} without wg)
+            interfaces = await self.get_all_interface_details()
 
             status = {
                 "connected": True,
@@ -704,35 +1185,13 @@ method=disabled
                 "transfer": None
             }
 
-            # Parse nmcli output for endpoint
-            for line in detail_result.stdout.split('\n'):
-                if 'wireguard.peer' in line.lower() and 'endpoint' in line.lower():
-                    # Extract endpoint from peer configuration
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        peer_data = parts[1].strip()
-                        if 'endpoint=' in peer_data:
-                            endpoint_part = peer_data.split('endpoint=')[1].split(',')[0]
-                            status["endpoint"] = endpoint_part.strip()
-
-            # Try to get WireGuard stats if wg command is available
-            try:
-                wg_result = subprocess.run(
-                    ["wg", "show", WG_INTERFACE],
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
-
-                if wg_result.returncode == 0:
-                    for line in wg_result.stdout.split('\n'):
-                        line = line.strip()
-                        if line.startswith("latest handshake:"):
-                            status["latest_handshake"] = line.split("latest handshake:", 1)[1].strip()
-                        elif line.startswith("transfer:"):
-                            status["transfer"] = line.split("transfer:", 1)[1].strip()
-            except:
-                pass  # WireGuard stats are optional
+            # WireGuard stats, worded like `wg show`
+            wg_details = interfaces.get(WG_INTERFACE)
+            if wg_details:
+                status["endpoint"] = wg_details["endpoint_ip"]
+                status["latest_handshake"] = wg_details["last_handshake"]
+                if wg_details["transfer_rx"]:
+                    status["transfer"] = f"{wg_details['transfer_rx']}, {wg_details['transfer_tx']}"
 
             return status
 
@@ -753,80 +1212,88 @@ method=disabled
             Public IP address or None
         """
         try:
-            response = await self.client.get("https://api.ipify.org?format=json")
-            response.raise_for_status()
-            data = response.json()
-            return data.get("ip")
+            return await self._fetch_public_ip()
         except Exception as e:
             logger.error(f"Failed to get public IP: {e}")
             return None
 
+    @async_ttl_cache(PUBLIC_IP_CACHE_TTL)
+    async def _fetch_public_ip(self) -> str:
+        """Ask all public IP providers at once and return the first answer.
+
+        Returns:
+            Public IP address
+        """
+        tasks = [asyncio.create_task(self._query_public_ip_provider(url)) for url in PUBLIC_IP_PROVIDERS]
+        try:
+            last_error = None
+            for next_result in asyncio.as_completed(tasks):
+                try:
+                    return await next_result
+                except Exception as e:
+                    last_error = e
+            raise last_error
+        finally:
+            # Stop the providers that lost the race
+            for task in tasks:
+                task.cancel()
+
+    async def _query_public_ip_provider(self, url: str) -> str:
+        """Get the public IP address from a single plain-text provider.
+
+        Args:
+            url: Provider URL
+
+        Returns:
+            Public IP address
+        """
+        response = await self.client.get(url, timeout=10.0)
+        response.raise_for_status()
+        ip = response.text.strip()
+        if not ip:
+            raise ValueError(f"Empty response from {url}")
+        return ip
+
     async def get_active_connections(self) -> List[Dict]:
         """Get list of all active PIA connections with caching.
 
         Returns:
             List of active connection info dicts with region_id and interface
         """
-        import time
-
-        # Check cache first to reduce CPU load
-        now = time.time()
-        if (self._active_connections_cache is not None and
-            now - self._active_connections_cache_time < self._cache_ttl):
-            return self._active_connections_cache
-
         try:
-            # Get list of active interface names from nmcli
-            result = subprocess.run(
-                ["nmcli", "connection", "show", "--active"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            return await self._load_active_connections()
+        except Exception as e:
+            logger.error(f"Failed to get active connections: {e}")
+            return []
 
-            active_interfaces = set()
-            for line in result.stdout.split('\n'):
-                if WG_INTERFACE_PREFIX in line:
-                    parts = line.split()
-                    if len(parts) > 0:
-                        interface_name = parts[0]
-                        if interface_name.startswith(WG_INTERFACE_PREFIX):
-                            active_interfaces.add(interface_name)
-
-            # Get region_ids from database for enabled devices
-            from app.models import DeviceRoutingDB
-            routing_configs = await DeviceRoutingDB.get_all()
-
-            active_connections = []
-            seen_regions = set()
-
-            for config in routing_configs:
-                if config.get("enabled") and config.get("region_id"):
-                    region_id = config["region_id"]
-                    # Skip if already added
-                    if region_id in seen_regions:
-                        continue
+    # Cached to reduce CPU load; concurrent pollers share one nmcli call
+    @async_ttl_cache(ACTIVE_CONNECTIONS_CACHE_TTL)
+    async def _load_active_connections(self) -> List[Dict]:
+        """Look up active PIA connections for enabled device routes.
 
-                    # Check if this region's interface is actually active
-                    interface_name = self._get_interface_name(region_id)
-                    if interface_name in active_interfaces:
-                        active_connections.append({
-                            "region_id": region_id,
-                            "interface": interface_name,
-                            "connected": True
-                        })
-                        seen_regions.add(region_id)
+        Returns:
+            List of active connection info dicts (shared; must not be modified)
+        """
+        # Get list of active connection names from nmcli
+        active_interfaces = await self._get_active_connection_names()
 
-            # Update cache
-            self._active_connections_cache = active_connections
-            self._active_connections_cache_time = now
+        # Get region_ids from database for enabled devices
+        from app.models import DeviceRoutingDB
+        region_ids = await DeviceRoutingDB.get_enabled_region_ids()
 
-            logger.info(f"Found {len(active_connections)} active PIA connections (cache updated)")
-            return active_connections
+        active_connections = []
+        for region_id in region_ids:
+            # Check if this region's interface is actually active
+            interface_name = self._get_interface_name(region_id)
+            if interface_name in active_interfaces:
+                active_connections.append({
+                    "region_id": region_id,
+                    "interface": interface_name,
+                    "connected": True
+                })
 
-        except Exception as e:
-            logger.error(f"Failed to get active connections: {e}")
-            return []
+        logger.debug(f"Found {len(active_connections)} active PIA connections (cache updated)")
+        return active_connections
 
     async def get_interface_details(self, interface_name: str) -> Dict:
         """Get detailed information about a WireGuard interface.
@@ -838,15 +1305,14 @@ method=disabled
             Dictionary with interface details including handshake time and transfer bytes
         """
         try:
-            # Get WireGuard interface stats
-            result = subprocess.run(
-                ["wg", "show", interface_name],
-                capture_output=True,
-                text=True,
+            # Get WireGuard interface stats (machine-readable, exact byte counts)
+            result = await self._run(
+                ["wg", "show", interface_name, "dump"],
                 check=True
             )
 
-            details = {
+            details = self._parse_wg_dump(result.stdout, interface_name).get(interface_name)
+            return details or {
                 "interface": interface_name,
                 "last_handshake": None,
                 "transfer_rx": None,
@@ -856,36 +1322,6 @@ method=disabled
                 "endpoint_ip": None
             }
 
-            # Parse wg show output
-            for line in result.stdout.split('\n'):
-                line = line.strip()
-                if line.startswith("endpoint:"):
-                    # Extract endpoint IP (e.g., "endpoint: 188.215.235.100:1337")
-                    endpoint_text = line.replace("endpoint:", "").strip()
-                    if ":" in endpoint_text:
-                        endpoint_ip = endpoint_text.split(":")[0]
-                        details["endpoint_ip"] = endpoint_ip
-                elif line.startswith("latest handshake:"):
-                    # Extract handshake time (e.g., "1 minute, 23 seconds ago")
-                    handshake_text = line.replace("latest handshake:", "").strip()
-                    details["last_handshake"] = handshake_text
-                elif line.startswith("transfer:"):
-                    # Extract transfer stats (e.g., "12.45 MiB received, 3.21 MiB sent")
-                    transfer_text = line.replace("transfer:", "").strip()
-                    if "received" in transfer_text and "sent" in transfer_text:
-                        parts = transfer_text.split(",")
-                        if len(parts) == 2:
-                            rx_str = parts[0].strip()
-                            tx_str = parts[1].strip()
-                            details["transfer_rx"] = rx_str
-                            details["transfer_tx"] = tx_str
-
-                            # Parse to bytes for rate calculation
-                            details["transfer_rx_bytes"] = self._parse_transfer_to_bytes(rx_str)
-                            details["transfer_tx_bytes"] = self._parse_transfer_to_bytes(tx_str)
-
-            return details
-
         except Exception as e:
             logger.error(f"Failed to get interface details for {interface_name}: {e}")
             return {
@@ -898,40 +1334,160 @@ method=disabled
                 "endpoint_ip": None
             }
 
-    def _parse_transfer_to_bytes(self, transfer_str: str) -> int:
-        """Parse transfer string to bytes.
+    async def get_all_interface_details(self) -> Dict[str, Dict]:
+        """Get details for all WireGuard interfaces with a single `wg show all dump`.
+
+        Returns:
+            Dictionary of interface details (as returned by get_interface_details)
+            keyed by interface name
+        """
+        try:
+            result = await self._run(
+                ["wg", "show", "all", "dump"],
+                check=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to get WireGuard interface details: {e}")
+            return {}
+
+        return self._parse_wg_dump(result.stdout)
+
+    def _parse_wg_dump(self, output: str, interface_name: Optional[str] = None) -> Dict[str, Dict]:
+        """Parse `wg show ... dump` output into interface details.
 
         Args:
-            transfer_str: String like "57.65 MiB received" or "3.21 GiB sent"
+            output: Output of `wg show all dump`, or of `wg show <interface> dump`
+                when interface_name is given (those lines have no interface column)
+            interface_name: Interface the output belongs to
 
         Returns:
-            Number of bytes
+            Dictionary of interface details keyed by interface name
         """
-        if not transfer_str:
-            return 0
-
-        # Extract number and unit (e.g., "57.65 MiB received" -> ["57.65", "MiB"])
-        import re
-        match = re.match(r'([\d.]+)\s*([KMGT]i?B)', transfer_str, re.IGNORECASE)
-        if not match:
-            return 0
-
-        value = float(match.group(1))
-        unit = match.group(2).upper()
-
-        multipliers = {
-            'B': 1,
-            'KB': 1000,
-            'KIB': 1024,
-            'MB': 1000 * 1000,
-            'MIB': 1024 * 1024,
-            'GB': 1000 * 1000 * 1000,
-            'GIB': 1024 * 1024 * 1024,
-            'TB': 1000 * 1000 * 1000 * 1000,
-            'TIB': 1024 * 1024 * 1024 * 1024
-        }
-
-        return int(value * multipliers.get(unit, 1))
+        all_details = {}
+        now = int(time.time())
+
+        # Peer lines: interface, public key, preshared key, endpoint, allowed ips,
+        # latest handshake (unix time), rx bytes, tx bytes, persistent keepalive.
+        # Interface lines have 5 fields and carry nothing we report.
+        for line in output.splitlines():
+            fields = line.split('\t')
+            if interface_name is not None:
+                fields.insert(0, interface_name)
+            if len(fields) != 9:
+                continue
+
+            name = fields[0]
+            endpoint = fields[3]
+            handshake = int(fields[5])
+            rx_bytes = int(fields[6])
+            tx_bytes = int(fields[7])
+
+            details = {
+                "interface": name,
+                "last_handshake": None,
+                "transfer_rx": None,
+                "transfer_tx": None,
+                "transfer_rx_bytes": rx_bytes,
+                "transfer_tx_bytes": tx_bytes,
+                "endpoint_ip": None
+            }
+
+            if endpoint != "(none)":
+                # Strip the port (and brackets around IPv6 addresses)
+                details["endpoint_ip"] = endpoint.rsplit(":", 1)[0].strip("[]")
+
+            # Same wording as `wg show <interface>`, which only shows these when set
+            if handshake:
+                details["last_handshake"] = self._format_handshake_age(now - handshake)
+            if rx_bytes or tx_bytes:
+                details["transfer_rx"] = f"{self._format_transfer_bytes(rx_bytes)} received"
+                details["transfer_tx"] = f"{self._format_transfer_bytes(tx_bytes)} sent"
+
+            all_details[name] = details
+
+        return all_details
+
+    def _format_handshake_age(self, seconds: int) -> str:
+        """Format a handshake age like `wg show` (e.g. "1 minute, 23 seconds ago").
+
+        Args:
+            seconds: Seconds since the latest handshake
+
+        Returns:
+            Human readable handshake age
+        """
+        if seconds <= 0:
+            return "Now"
+
+        parts = []
+        for unit, unit_seconds in (("year", 365 * 86400), ("day", 86400), ("hour", 3600),
+                                   ("minute", 60), ("second", 1)):
+            value, seconds = divmod(seconds, unit_seconds)
+            if value:
+                parts.append(f"{value} {unit}{'' if value == 1 else 's'}")
+
+        return ", ".join(parts) + " ago"
+
+    def _format_transfer_bytes(self, num_bytes: int) -> str:
+        """Format a byte count like `wg show` (e.g. "12.45 MiB").
+
+        Args:
+            num_bytes: Number of bytes
+
+        Returns:
+            Human readable size
+        """
+        if num_bytes < 1024:
+            return f"{num_bytes} B"
+
+        value = float(num_bytes)
+        for unit in ("KiB", "MiB", "GiB"):
+            value /= 1024
+            if value < 1024:
+                return f"{value:.2f} {unit}"
+
+        return f"{value / 1024:.2f} TiB"
+
+    # Shared by all status checks; concurrent and back-to-back callers reuse one nmcli call
+    @async_ttl_cache(ACTIVE_CONNECTION_NAMES_CACHE_TTL)
+    async def _get_active_connection_names(self) -> frozenset:
+        """Get the names of all active NetworkManager connections.
+
+        Returns:
+            Set of active connection names
+        """
+        # Terse output: one connection name per line
+        result = await self._run(
+            ["nmcli", "-t", "-f", "NAME", "connection", "show", "--active"],
+            check=True
+        )
+        return frozenset(result.stdout.splitlines())
+
+    async def get_region_statuses(self, region_ids: List[str]) -> Dict[str, Dict]:
+        """Get status of several region connections with a single nmcli call.
+
+        Args:
+            region_ids: PIA region IDs
+
+        Returns:
+            Status dictionaries (as returned by get_region_status) keyed by region ID
+        """
+        try:
+            active_names = await self._get_active_connection_names()
+        except Exception as e:
+            logger.error(f"Failed to get region statuses: {e}")
+            active_names = frozenset()
+
+        statuses = {}
+        for region_id in region_ids:
+            interface_name = self._get_interface_name(region_id)
+            statuses[region_id] = {
+                "region_id": region_id,
+                "interface": interface_name,
+                "connected": interface_name in active_names
+            }
+
+        return statuses
 
     async def get_region_status(self, region_id: str) -> Dict:
         """Get status of a specific region connection.
@@ -946,14 +1502,7 @@ method=disabled
             interface_name = self._get_interface_name(region_id)
 
             # Check if connection is active
-            result = subprocess.run(
-                ["nmcli", "connection", "show", "--active"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            is_active = interface_name in result.stdout
+            is_active = interface_name in await self._get_active_connection_names()
 
             return {
                 "region_id": region_id,
@@ -998,21 +1547,139 @@ method=disabled
 
             # Generate and write config
             logger.info(f"Establishing connection to region {region_id}")
-            config = await self.generate_wireguard_config(
+            params = await self.generate_wireguard_params(
                 region_id=region_id,
                 region_data=region_data,
                 username=username,
                 password=password
             )
-            await self.write_wireguard_config(config, region_id)
+            await self.write_wireguard_config(params, region_id)
 
             # Connect
-            return await self.connect_region(region_id)
+            if await self.connect_region(region_id):
+                return True
+
+            if region_id not in self._reused_registrations:
+                return False
+
+            return await self._reconnect_with_new_key(region_id, region_data, username, password)
 
         except Exception as e:
             logger.error(f"Failed to ensure connection to region {region_id}: {e}")
             return False
 
+    async def _reconnect_with_new_key(self, region_id: str, region_data: Dict,
+                                      username: str, password: str) -> bool:
+        """Replace a reused registration that failed with a newly registered key.
+
+        Args:
+            region_id: PIA region ID
+            region_data: Region data from database
+            username: PIA username
+            password: PIA password
+
+        Returns:
+            True if connected successfully
+        """
+        # The reused registration may have been dropped by PIA; register a new key
+        logger.info(f"Connection to {region_id} failed with a reused registration, registering a new key")
+        self._forget_registration(region_id)
+        params = await self.generate_wireguard_params(
+            region_id=region_id,
+            region_data=region_data,
+            username=username,
+            password=password
+        )
+        await self.write_wireguard_config(params, region_id)
+        return await self.connect_region(region_id)
+
+    async def ensure_region_connections(
+        self,
+        regions: Dict[str, Dict],
+        username: str,
+        password: str
+    ) -> Dict[str, bool]:
+        """Ensure connections to several regions are established concurrently.
+
+        Configs for all disconnected regions are generated in parallel,
+        NetworkManager is reloaded once if any of them changed, the
+        connections are then brought up in parallel, and the VPN bypass
+        rules for their servers are added in one batch.
+
+        Args:
+            regions: Region data from database, keyed by PIA region ID
+            username: PIA username
+            password: PIA password
+
+        Returns:
+            Dict mapping each region ID to whether it is connected
+        """
+        semaphore = asyncio.Semaphore(REGION_CONNECT_CONCURRENCY)
+        server_ips = {}
+        changed = set()
+
+        async def prepare(region_id: str) -> Optional[bool]:
+            # True if already connected, False on failure, None once the config is written
+            async with semaphore:
+                try:
+                    if statuses[region_id]["connected"]:
+                        logger.info(f"Region {region_id} already connected")
+                        return True
+
+                    logger.info(f"Establishing connection to region {region_id}")
+                    params = await self.generate_wireguard_params(
+                        region_id=region_id,
+                        region_data=regions[region_id],
+                        username=username,
+                        password=password
+                    )
+                    if await self.write_wireguard_config(params, region_id, reload=False):
+                        changed.add(region_id)
+                    server_ips[region_id] = params["Endpoint"].rsplit(":", 1)[0]
+                    return None
+
+                except Exception as e:
+                    logger.error(f"Failed to ensure connection to region {region_id}: {e}")
+                    return False
+
+        async def connect(region_id: str) -> bool:
+            async with semaphore:
+                if await self._bring_up_region(region_id):
+                    return True
+
+            if region_id not in self._reused_registrations:
+                return False
+
+            try:
+                return await self._reconnect_with_new_key(region_id, regions[region_id], username, password)
+            except Exception as e:
+                logger.error(f"Failed to ensure connection to region {region_id}: {e}")
+                return False
+
+        region_ids = list(regions)
+        statuses = await self.get_region_statuses(region_ids)
+        results = dict(zip(region_ids, await asyncio.gather(*(prepare(r) for r in region_ids))))
+
+        pending = [region_id for region_id, state in results.items() if state is None]
+        if pending:
+            try:
+                await self._run(["sysctl", "-w", "net.ipv4.ip_forward=1"], check=True)
+                if changed:
+                    await self._reload_connections()
+            except Exception as e:
+                logger.error(f"Failed to prepare NetworkManager connections: {e}")
+                results.update((region_id, False) for region_id in pending)
+                return results
+
+            results.update(zip(pending, await asyncio.gather(*(connect(r) for r in pending))))
+
+            # Servers of connections brought up here (fallbacks add their own rules)
+            connected_ips = [server_ips[r] for r in pending if results[r] and r in server_ips]
+            if connected_ips:
+                await self._add_server_bypass_rules(connected_ips)
+
+        return results
+
     async def cleanup_unused_connections(self, active_regions: List[str]) -> None:
         """Disconnect and remove connections not in the active regions list.
 
@@ -1023,23 +1690,19 @@ method=disabled
             # Get all active connections
             all_active = await self.get_active_connections()
 
-            for conn in all_active:
-                region_id = conn["region_id"]
-                if region_id not in active_regions:
-                    logger.info(f"Cleaning up unused connection to {region_id}")
-                    await self.disconnect_region(region_id)
+            keep = set(active_regions)
+            unused = [conn["region_id"] for conn in all_active if conn["region_id"] not in keep]
+            if unused:
+                logger.info(f"Cleaning up unused connections to {', '.join(unused)}")
+
+            # Disconnects are independent, so run them concurrently
+            await asyncio.gather(*(self.disconnect_region(region_id) for region_id in unused))
 
         except Exception as e:
             logger.error(f"Failed to cleanup unused connections: {e}")
 
 
-# Global service instance
-_pia_service: Optional[PIAService] = None
-
-
+@lru_cache(maxsize=1)
 def get_pia_service() -> PIAService:
     """Get or create PIA service instance."""
-    global _pia_service
-    if _pia_service is None:
-        _pia_service = PIAService()
-    return _pia_service
+    return PIAService()
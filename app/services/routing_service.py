@@ -1,8 +1,10 @@
 """Routing service for managing iptables rules and device routing."""
 
+import asyncio
 import subprocess
 import logging
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,21 @@ PIA_INTERFACE_PREFIX = "pia-"
 BASE_ROUTING_TABLE = 100  # Start routing tables from 100
 PIA_DNS_SERVERS = ["10.0.0.243", "10.0.0.242"]  # PIA DNS servers
 
+# Base NAT/forwarding rules per table, in `iptables-save` format so they can be
+# compared against the current ruleset and applied with `iptables-restore`
+BASE_IPTABLES_RULES = {
+    "nat": [
+        (f"-A POSTROUTING -o {PIA_INTERFACE} -j MASQUERADE",
+         "MASQUERADE rule for PIA interface"),
+    ],
+    "filter": [
+        (f"-A FORWARD -i {TAILSCALE_INTERFACE} -o {PIA_INTERFACE} -j ACCEPT",
+         "FORWARD rule Tailscale -> PIA"),
+        (f"-A FORWARD -i {PIA_INTERFACE} -o {TAILSCALE_INTERFACE} -m state --state RELATED,ESTABLISHED -j ACCEPT",
+         "FORWARD rule PIA -> Tailscale (established)"),
+    ],
+}
+
 
 class RoutingService:
     """Service for managing iptables routing rules."""
@@ -20,6 +37,12 @@ class RoutingService:
         self.enabled_devices: set[str] = set()
         self.device_table_map: dict[str, int] = {}  # Map device_ip -> table_id
         self.next_table_id: int = BASE_ROUTING_TABLE
+        # Shadow of the installed iptables rules (table -> rules in `iptables-save`
+        # format), loaded on first use and dropped whenever rules are deleted
+        self._iptables_rules: Optional[dict[str, set[str]]] = None
+        self._iptables_lock = asyncio.Lock()
+        # (device_ip, table_id) policy rules known to be installed
+        self._ip_rules: set[tuple[str, int]] = set()
 
     async def enable_ip_forwarding(self) -> bool:
         """Enable IP forwarding.
@@ -28,12 +51,14 @@ class RoutingService:
             True if successful
         """
         try:
-            subprocess.run(
+            await asyncio.to_thread(
+                subprocess.run,
                 ["sysctl", "-w", "net.ipv4.ip_forward=1"],
                 check=True,
                 capture_output=True
             )
-            subprocess.run(
+            await asyncio.to_thread(
+                subprocess.run,
                 ["sysctl", "-w", "net.ipv6.conf.all.forwarding=1"],
                 check=True,
                 capture_output=True
@@ -51,7 +76,8 @@ class RoutingService:
             True if IP forwarding is enabled
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["sysctl", "net.ipv4.ip_forward"],
                 capture_output=True,
                 text=True,
@@ -64,81 +90,36 @@ class RoutingService:
     async def setup_base_rules(self) -> bool:
         """Setup base iptables rules for NAT.
 
+        Existing rules are read with a single `iptables-save` (concurrently with
+        the `ip rule` check) and any missing ones are added in one
+        `iptables-restore --noflush` transaction. The ruleset is always re-read,
+        so rules flushed outside the app (e.g. a firewall reload) are restored.
+
         Returns:
             True if successful
         """
         try:
-            # Enable MASQUERADE for PIA interface
-            subprocess.run(
-                ["iptables", "-t", "nat", "-C", "POSTROUTING", "-o", PIA_INTERFACE, "-j", "MASQUERADE"],
-                capture_output=True,
-                check=False
-            )
-            # If check failed (rule doesn't exist), add it
-            result = subprocess.run(
-                ["iptables", "-t", "nat", "-C", "POSTROUTING", "-o", PIA_INTERFACE, "-j", "MASQUERADE"],
-                capture_output=True,
-                check=False
-            )
-            if result.returncode != 0:
-                subprocess.run(
-                    ["iptables", "-t", "nat", "-A", "POSTROUTING", "-o", PIA_INTERFACE, "-j", "MASQUERADE"],
-                    check=True,
-                    capture_output=True
-                )
-                logger.info("Added MASQUERADE rule for PIA interface")
-
-            # Allow forwarding from Tailscale to PIA
-            subprocess.run(
-                ["iptables", "-C", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", PIA_INTERFACE, "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
-            result = subprocess.run(
-                ["iptables", "-C", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", PIA_INTERFACE, "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
-            if result.returncode != 0:
-                subprocess.run(
-                    ["iptables", "-A", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", PIA_INTERFACE, "-j", "ACCEPT"],
-                    check=True,
-                    capture_output=True
-                )
-                logger.info("Added FORWARD rule Tailscale -> PIA")
-
-            # Allow return traffic
-            subprocess.run(
-                ["iptables", "-C", "FORWARD", "-i", PIA_INTERFACE, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
-            result = subprocess.run(
-                ["iptables", "-C", "FORWARD", "-i", PIA_INTERFACE, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
-            if result.returncode != 0:
-                subprocess.run(
-                    ["iptables", "-A", "FORWARD", "-i", PIA_INTERFACE, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                    check=True,
-                    capture_output=True
-                )
-                logger.info("Added FORWARD rule PIA -> Tailscale (established)")
+            self._iptables_rules = None
 
             # Add routing policy rule to bypass WireGuard's catch-all table for Tailscale exit node traffic
             # WireGuard creates rule "31127: not from all fwmark 0xcafd lookup 51965" which routes
             # ALL non-WireGuard traffic through the VPN. We need to exempt Tailscale exit node traffic.
             # Priority 30000 ensures this rule is checked BEFORE WireGuard's rule 31127.
-            check_rule = subprocess.run(
-                ["ip", "rule", "list"],
-                capture_output=True,
-                text=True,
-                check=False
+            # The iptables and policy rule checks are independent, so run them concurrently
+            _, check_rule = await asyncio.gather(
+                self._ensure_iptables_rules(BASE_IPTABLES_RULES),
+                asyncio.to_thread(
+                    subprocess.run,
+                    ["ip", "rule", "list"],
+                    capture_output=True,
+                    text=True,
+                    check=False
+                )
             )
 
             if "from all iif tailscale0 lookup main" not in check_rule.stdout:
-                subprocess.run(
+                await asyncio.to_thread(
+                    subprocess.run,
                     ["ip", "rule", "add", "from", "all", "iif", TAILSCALE_INTERFACE, "lookup", "main", "priority", "30000"],
                     check=True,
                     capture_output=True
@@ -152,24 +133,138 @@ class RoutingService:
             logger.error(f"Failed to setup base rules: {e}")
             return False
 
-    async def cleanup_duplicate_rules(self, device_ip: str, keep_table_id: int) -> None:
+    async def _read_iptables_rules(self) -> dict[str, set[str]]:
+        """Read the current iptables ruleset with a single `iptables-save`.
+
+        Returns:
+            Dict mapping table name to its rules in `iptables-save` format
+        """
+        result = await asyncio.to_thread(
+            subprocess.run,
+            ["iptables-save"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+        tables: dict[str, set[str]] = {}
+        rules: set[str] = set()
+        for line in result.stdout.splitlines():
+            if line.startswith("*"):
+                rules = tables.setdefault(line[1:], set())
+            elif line.startswith("-A "):
+                rules.add(line)
+
+        return tables
+
+    async def _ensure_iptables_rules(self, rules: Dict[str, List[tuple[str, str]]]) -> None:
+        """Add whichever of the given iptables rules are missing, in one transaction.
+
+        Rules are compared against the in-memory shadow of the ruleset, so the
+        no-op case doesn't run any command.
+
+        Args:
+            rules: Dict mapping table name to (rule, description) pairs. Rules are in
+                `iptables-save` format; rules starting with "-I" are inserted at the
+                top of their chain and compared against the equivalent "-A" rule.
+        """
+        # Serialize check-and-add so concurrent callers can't both append the same rule
+        async with self._iptables_lock:
+            if self._iptables_rules is None:
+                self._iptables_rules = await self._read_iptables_rules()
+            existing = self._iptables_rules
+
+            missing = {
+                table: [
+                    (rule, description) for rule, description in table_rules
+                    if "-A" + rule[2:] not in existing.get(table, set())
+                ]
+                for table, table_rules in rules.items()
+            }
+            try:
+                await self._restore_iptables_rules({
+                    table: [rule for rule, _ in table_rules]
+                    for table, table_rules in missing.items()
+                })
+            except subprocess.CalledProcessError:
+                # Don't trust the shadow after a failed transaction
+                self._iptables_rules = None
+                raise
+
+            for table, table_rules in missing.items():
+                for rule, description in table_rules:
+                    existing.setdefault(table, set()).add("-A" + rule[2:])
+                    logger.info(f"Added {description}")
+
+    async def _restore_iptables_rules(self, rules: dict[str, List[str]]) -> None:
+        """Apply rules to their tables in one `iptables-restore --noflush` call.
+
+        Args:
+            rules: Dict mapping table name to rules in `iptables-save` format
+        """
+        lines = []
+        for table, table_rules in rules.items():
+            if table_rules:
+                lines.append(f"*{table}")
+                lines.extend(table_rules)
+                lines.append("COMMIT")
+
+        if not lines:
+            return
+
+        await asyncio.to_thread(
+            subprocess.run,
+            ["iptables-restore", "--noflush"],
+            input="\n".join(lines) + "\n",
+            text=True,
+            check=True,
+            capture_output=True
+        )
+
+    async def _run_ip_batch(self, commands: List[str]) -> subprocess.CompletedProcess:
+        """Run several `ip` commands in one process with `ip -force -batch -`.
+
+        Failing commands don't stop the rest of the batch.
+
+        Args:
+            commands: `ip` commands without the leading "ip"
+
+        Returns:
+            Completed process; a non-zero return code means at least one command failed
+        """
+        return await asyncio.to_thread(
+            subprocess.run,
+            ["ip", "-force", "-batch", "-"],
+            input="\n".join(commands) + "\n",
+            capture_output=True,
+            text=True,
+            check=False
+        )
+
+    async def cleanup_duplicate_rules(self, device_ip: str, keep_table_id: int,
+                                      rule_list: Optional[str] = None) -> None:
         """Remove duplicate routing rules for a device, keeping only the specified table.
 
         Args:
             device_ip: Device IP address
             keep_table_id: Table ID to keep (all others will be removed)
+            rule_list: Output of `ip rule list` if the caller already has it
         """
         try:
             # Get all existing rules for this device
-            result = subprocess.run(
-                ["ip", "rule", "list"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            if rule_list is None:
+                result = await asyncio.to_thread(
+                    subprocess.run,
+                    ["ip", "rule", "list"],
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
+                rule_list = result.stdout
 
-            # Parse rules and delete duplicates
-            for line in result.stdout.splitlines():
+            # Parse rules and collect duplicates
+            duplicates = []
+            for line in rule_list.splitlines():
                 if f"from {device_ip} lookup" in line:
                     # Extract table ID from rule
                     parts = line.split()
@@ -182,22 +277,30 @@ class RoutingService:
                             if rule_table_id != keep_table_id:
                                 # Extract priority
                                 priority = int(parts[0].rstrip(':'))
-                                subprocess.run(
-                                    ["ip", "rule", "delete", "prio", str(priority)],
-                                    capture_output=True,
-                                    check=False
-                                )
-                                logger.info(f"Removed duplicate rule: priority {priority}, table {rule_table_id} for {device_ip}")
+                                duplicates.append((priority, rule_table_id))
+
+            if duplicates:
+                await self._run_ip_batch([f"rule delete prio {priority}" for priority, _ in duplicates])
+                for priority, rule_table_id in duplicates:
+                    logger.info(f"Removed duplicate rule: priority {priority}, table {rule_table_id} for {device_ip}")
 
         except Exception as e:
             logger.warning(f"Error during rule cleanup for {device_ip}: {e}")
 
-    async def enable_device_routing(self, device_ip: str, pia_interface: str) -> bool:
+    async def enable_device_routing(self, device_ip: str, pia_interface: str,
+                                    force: bool = False) -> bool:
         """Enable routing for a specific device IP through a PIA interface.
 
+        The device's routing table is rebuilt with one `ip -batch` call and its
+        NAT, FORWARD and DNS interception rules are added in one
+        `iptables-restore` transaction.
+
         Args:
             device_ip: Device IP address
             pia_interface: PIA interface name (e.g., pia-de, pia-sg)
+            force: Re-read the installed rules instead of trusting the in-memory
+                shadow (use for device toggles and when the live state drifted,
+                since rules may have been removed outside the app)
 
         Returns:
             True if successful
@@ -210,48 +313,51 @@ class RoutingService:
 
             table_id = self.device_table_map[device_ip]
 
-            # Clean up any duplicate rules for this device FIRST
-            await self.cleanup_duplicate_rules(device_ip, table_id)
+            if force:
+                # Rules may have been removed outside the app
+                self._ip_rules.discard((device_ip, table_id))
+                self._iptables_rules = None
 
-            # Check if route already exists
-            result = subprocess.run(
-                ["ip", "rule", "list"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            if (device_ip, table_id) not in self._ip_rules:
+                # One rule listing serves both the duplicate cleanup and the existence check
+                result = await asyncio.to_thread(
+                    subprocess.run,
+                    ["ip", "rule", "list"],
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
 
-            rule_exists = f"from {device_ip} lookup {table_id}" in result.stdout
+                # Clean up any duplicate rules for this device FIRST
+                await self.cleanup_duplicate_rules(device_ip, table_id, result.stdout)
 
-            if not rule_exists:
-                # Add routing rule: traffic from device_ip should use its assigned table
-                subprocess.run(
-                    ["ip", "rule", "add", "from", device_ip, "table", str(table_id)],
-                    check=True,
-                    capture_output=True
-                )
-                logger.info(f"Added routing rule for {device_ip} to use table {table_id}")
+                rule_exists = f"from {device_ip} lookup {table_id}" in result.stdout
 
-            # Clear any existing routes in this table
-            subprocess.run(
-                ["ip", "route", "flush", "table", str(table_id)],
-                capture_output=True,
-                check=False
-            )
+                if not rule_exists:
+                    # Add routing rule: traffic from device_ip should use its assigned table
+                    await asyncio.to_thread(
+                        subprocess.run,
+                        ["ip", "rule", "add", "from", device_ip, "table", str(table_id)],
+                        check=True,
+                        capture_output=True
+                    )
+                    logger.info(f"Added routing rule for {device_ip} to use table {table_id}")
 
-            # Add exception routes BEFORE default route (more specific routes take precedence)
+                self._ip_rules.add((device_ip, table_id))
 
-            # Exception 1: Tailscale network should use main routing table
-            subprocess.run(
-                ["ip", "route", "add", "100.64.0.0/10", "dev", TAILSCALE_INTERFACE, "table", str(table_id)],
-                capture_output=True,
-                check=False
-            )
-            logger.info(f"Added Tailscale network exception in table {table_id}")
+            # Rebuild this device's table: clear any existing routes, then add
+            # exception routes BEFORE the default route (more specific routes take precedence)
+            route_commands = [
+                f"route flush table {table_id}",
+                # Exception 1: Tailscale network should use main routing table
+                f"route add 100.64.0.0/10 dev {TAILSCALE_INTERFACE} table {table_id}",
+            ]
 
             # Exception 2: Local network should use main routing table
             # Get default gateway from main table
-            gateway_result = subprocess.run(
+            gateway_ip = None
+            gateway_result = await asyncio.to_thread(
+                subprocess.run,
                 ["ip", "route", "show", "default"],
                 capture_output=True,
                 text=True,
@@ -261,52 +367,32 @@ class RoutingService:
                 # Extract gateway IP and interface
                 parts = gateway_result.stdout.strip().split()
                 if "via" in parts:
-                    gateway_idx = parts.index("via") + 1
-                    gateway_ip = parts[gateway_idx]
+                    gateway_ip = parts[parts.index("via") + 1]
 
                     # Add route for local network through default gateway
-                    subprocess.run(
-                        ["ip", "route", "add", "10.36.0.0/22", "via", gateway_ip, "table", str(table_id)],
-                        capture_output=True,
-                        check=False
-                    )
-                    logger.info(f"Added local network exception via {gateway_ip} in table {table_id}")
+                    route_commands.append(f"route add 10.36.0.0/22 via {gateway_ip} table {table_id}")
 
             # Add default route via PIA interface in this device's table
-            result = subprocess.run(
-                ["ip", "route", "add", "default", "dev", pia_interface, "table", str(table_id)],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-
-            if result.returncode == 0:
-                logger.info(f"Added default route via {pia_interface} in table {table_id} for {device_ip}")
-            elif "File exists" not in result.stderr:
-                # Only raise if it's not a "route exists" error
-                logger.warning(f"Failed to add route for {device_ip}: {result.stderr}")
-
-            # Add device-specific MASQUERADE rule for NAT
-            # CRITICAL: Must restrict by source IP to prevent traffic leakage from non-routed devices
-            result = subprocess.run(
-                ["iptables", "-t", "nat", "-C", "POSTROUTING", "-s", device_ip, "-o", pia_interface, "-j", "MASQUERADE"],
-                capture_output=True,
-                check=False
-            )
+            route_commands.append(f"route add default dev {pia_interface} table {table_id}")
 
+            result = await self._run_ip_batch(route_commands)
             if result.returncode != 0:
-                subprocess.run(
-                    ["iptables", "-t", "nat", "-A", "POSTROUTING", "-s", device_ip, "-o", pia_interface, "-j", "MASQUERADE"],
-                    check=True,
-                    capture_output=True
-                )
-                logger.info(f"Added device-specific MASQUERADE rule for {device_ip} -> {pia_interface}")
+                logger.warning(f"Failed to add some routes for {device_ip}: {result.stderr.strip()}")
 
-            # Add device-specific FORWARD rules to prevent traffic leakage
-            await self.ensure_forward_rules(pia_interface, device_ip)
+            logger.info(f"Added Tailscale network exception in table {table_id}")
+            if gateway_ip:
+                logger.info(f"Added local network exception via {gateway_ip} in table {table_id}")
+            logger.info(f"Added default route via {pia_interface} in table {table_id} for {device_ip}")
 
-            # Ensure DNS interception rules to prevent DNS leaks
-            await self.ensure_dns_interception()
+            # Device-specific MASQUERADE and FORWARD rules, plus DNS interception to prevent DNS leaks
+            # CRITICAL: Must restrict by source IP to prevent traffic leakage from non-routed devices
+            rules = self._dns_interception_rules()
+            rules["nat"].append((
+                f"-A POSTROUTING -s {device_ip}/32 -o {pia_interface} -j MASQUERADE",
+                f"device-specific MASQUERADE rule for {device_ip} -> {pia_interface}"
+            ))
+            rules.update(self._forward_rules(pia_interface, device_ip))
+            await self._ensure_iptables_rules(rules)
 
             self.enabled_devices.add(device_ip)
             logger.info(f"Successfully enabled routing for device {device_ip} via {pia_interface}")
@@ -333,8 +419,13 @@ class RoutingService:
 
             table_id = self.device_table_map[device_ip]
 
+            # The rules are about to change, so drop the in-memory shadows
+            self._ip_rules.discard((device_ip, table_id))
+            self._iptables_rules = None
+
             # Remove policy routing rule
-            subprocess.run(
+            await asyncio.to_thread(
+                subprocess.run,
                 ["ip", "rule", "del", "from", device_ip, "table", str(table_id)],
                 capture_output=True,
                 check=False
@@ -342,75 +433,87 @@ class RoutingService:
             logger.info(f"Removed routing rule for {device_ip}")
 
             # Flush routes in this table
-            subprocess.run(
+            await asyncio.to_thread(
+                subprocess.run,
                 ["ip", "route", "flush", "table", str(table_id)],
                 capture_output=True,
                 check=False
             )
 
-            # Remove all MASQUERADE rules for this device
-            # We need to iterate and remove because we don't know which interface it was using
-            while True:
-                result = subprocess.run(
-                    ["iptables", "-t", "nat", "-L", "POSTROUTING", "-n", "--line-numbers"],
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
+            # Delete the iptables rules under the lock so a concurrent enable can't
+            # cache them mid-deletion; the shadow is dropped again once they're gone
+            async with self._iptables_lock:
+                try:
+                    # Remove all MASQUERADE rules for this device
+                    # We need to iterate and remove because we don't know which interface it was using
+                    while True:
+                        result = await asyncio.to_thread(
+                            subprocess.run,
+                            ["iptables", "-t", "nat", "-L", "POSTROUTING", "-n", "--line-numbers"],
+                            capture_output=True,
+                            text=True,
+                            check=False
+                        )
 
-                found_rule = False
-                for line in result.stdout.split('\n'):
-                    if device_ip in line and "MASQUERADE" in line:
-                        # Extract rule number (first column)
-                        parts = line.split()
-                        if len(parts) > 0 and parts[0].isdigit():
-                            rule_num = parts[0]
-                            subprocess.run(
-                                ["iptables", "-t", "nat", "-D", "POSTROUTING", rule_num],
-                                capture_output=True,
-                                check=False
-                            )
-                            logger.info(f"Removed MASQUERADE rule #{rule_num} for {device_ip}")
-                            found_rule = True
+                        found_rule = False
+                        for line in result.stdout.split('\n'):
+                            if device_ip in line and "MASQUERADE" in line:
+                                # Extract rule number (first column)
+                                parts = line.split()
+                                if len(parts) > 0 and parts[0].isdigit():
+                                    rule_num = parts[0]
+                                    await asyncio.to_thread(
+                                        subprocess.run,
+                                        ["iptables", "-t", "nat", "-D", "POSTROUTING", rule_num],
+                                        capture_output=True,
+                                        check=False
+                                    )
+                                    logger.info(f"Removed MASQUERADE rule #{rule_num} for {device_ip}")
+                                    found_rule = True
+                                    break
+
+                        if not found_rule:
                             break
 
-                if not found_rule:
-                    break
-
-            # Remove device-specific FORWARD rules for all PIA interfaces
-            # Get list of all pia-* interfaces
-            result = subprocess.run(
-                ["ip", "link", "show"],
-                capture_output=True,
-                text=True,
-                check=False
-            )
+                    # Remove device-specific FORWARD rules for all PIA interfaces
+                    # Get list of all pia-* interfaces
+                    result = await asyncio.to_thread(
+                        subprocess.run,
+                        ["ip", "link", "show"],
+                        capture_output=True,
+                        text=True,
+                        check=False
+                    )
 
-            pia_interfaces = []
-            for line in result.stdout.split('\n'):
-                if 'pia-' in line:
-                    # Extract interface name (format: "5: pia-sg: <POINTOPOINT,NOARP,UP,LOWER_UP>")
-                    parts = line.split(':')
-                    if len(parts) >= 2:
-                        iface = parts[1].strip()
-                        if iface.startswith('pia-'):
-                            pia_interfaces.append(iface)
-
-            # Remove FORWARD rules for this device on all PIA interfaces
-            for pia_iface in pia_interfaces:
-                # Remove outbound rule (device -> VPN)
-                subprocess.run(
-                    ["iptables", "-D", "FORWARD", "-i", TAILSCALE_INTERFACE, "-s", device_ip, "-o", pia_iface, "-j", "ACCEPT"],
-                    capture_output=True,
-                    check=False
-                )
+                    pia_interfaces = []
+                    for line in result.stdout.split('\n'):
+                        if 'pia-' in line:
+                            # Extract interface name (format: "5: pia-sg: <POINTOPOINT,NOARP,UP,LOWER_UP>")
+                            parts = line.split(':')
+                            if len(parts) >= 2:
+                                iface = parts[1].strip()
+                                if iface.startswith('pia-'):
+                                    pia_interfaces.append(iface)
+
+                    # Remove FORWARD rules for this device on all PIA interfaces
+                    for pia_iface in pia_interfaces:
+                        # Remove outbound rule (device -> VPN)
+                        await asyncio.to_thread(
+                            subprocess.run,
+                            ["iptables", "-D", "FORWARD", "-i", TAILSCALE_INTERFACE, "-s", device_ip, "-o", pia_iface, "-j", "ACCEPT"],
+                            capture_output=True,
+                            check=False
+                        )
 
-                # Remove inbound rule (VPN -> device)
-                subprocess.run(
-                    ["iptables", "-D", "FORWARD", "-i", pia_iface, "-d", device_ip, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                    capture_output=True,
-                    check=False
-                )
+                        # Remove inbound rule (VPN -> device)
+                        await asyncio.to_thread(
+                            subprocess.run,
+                            ["iptables", "-D", "FORWARD", "-i", pia_iface, "-d", device_ip, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
+                            capture_output=True,
+                            check=False
+                        )
+                finally:
+                    self._iptables_rules = None
 
             logger.info(f"Removed FORWARD rules for {device_ip}")
 
@@ -424,6 +527,52 @@ class RoutingService:
             logger.error(f"Failed to disable routing for device {device_ip}: {e}")
             return False
 
+    def _forward_rules(self, pia_interface: str,
+                       device_ip: Optional[str] = None) -> Dict[str, List[tuple[str, str]]]:
+        """Build the FORWARD rules for a PIA interface in `iptables-save` format.
+
+        Args:
+            pia_interface: PIA interface name (e.g., pia-de, pia-sg)
+            device_ip: Optional device IP to restrict the rules to a specific device
+
+        Returns:
+            Dict mapping table name to (rule, description) pairs
+        """
+        if device_ip:
+            # Device-specific FORWARD rule (prevents traffic leakage from non-routed devices);
+            # return traffic is destination-based, no need for source filter
+            return {"filter": [
+                (f"-A FORWARD -s {device_ip}/32 -i {TAILSCALE_INTERFACE} -o {pia_interface} -j ACCEPT",
+                 f"device-specific FORWARD rule: {device_ip} -> {pia_interface}"),
+                (f"-A FORWARD -d {device_ip}/32 -i {pia_interface} -o {TAILSCALE_INTERFACE} "
+                 f"-m state --state RELATED,ESTABLISHED -j ACCEPT",
+                 f"device-specific FORWARD rule: {pia_interface} -> {device_ip} (established)"),
+            ]}
+
+        return {"filter": [
+            (f"-A FORWARD -i {TAILSCALE_INTERFACE} -o {pia_interface} -j ACCEPT",
+             f"global FORWARD rule Tailscale -> {pia_interface}"),
+            (f"-A FORWARD -i {pia_interface} -o {TAILSCALE_INTERFACE} "
+             f"-m state --state RELATED,ESTABLISHED -j ACCEPT",
+             f"global FORWARD rule {pia_interface} -> Tailscale (established)"),
+        ]}
+
+    def _dns_interception_rules(self) -> Dict[str, List[tuple[str, str]]]:
+        """Build the DNS interception rules in `iptables-save` format.
+
+        Only the first PIA DNS server is used for interception.
+
+        Returns:
+            Dict mapping table name to (rule, description) pairs
+        """
+        dns_server = PIA_DNS_SERVERS[0]
+        return {"nat": [
+            (f"-I PREROUTING -i {TAILSCALE_INTERFACE} -p {proto} -m {proto} --dport 53 "
+             f"-j DNAT --to-destination {dns_server}:53",
+             f"DNS interception rule: {proto.upper()} queries -> {dns_server}")
+            for proto in ("udp", "tcp")
+        ]}
+
     async def ensure_forward_rules(self, pia_interface: str, device_ip: str = None) -> bool:
         """Ensure FORWARD rules exist for a PIA interface.
 
@@ -435,58 +584,11 @@ class RoutingService:
             True if successful
         """
         try:
-            if device_ip:
-                # Device-specific FORWARD rule (prevents traffic leakage from non-routed devices)
-                # Check if rule exists
-                check_cmd = ["iptables", "-C", "FORWARD", "-i", TAILSCALE_INTERFACE, "-s", device_ip, "-o", pia_interface, "-j", "ACCEPT"]
-                result = subprocess.run(check_cmd, capture_output=True, check=False)
-
-                if result.returncode != 0:
-                    # Rule doesn't exist, add it
-                    add_cmd = ["iptables", "-A", "FORWARD", "-i", TAILSCALE_INTERFACE, "-s", device_ip, "-o", pia_interface, "-j", "ACCEPT"]
-                    subprocess.run(add_cmd, check=True, capture_output=True)
-                    logger.info(f"Added device-specific FORWARD rule: {device_ip} -> {pia_interface}")
-
-                # Return traffic (destination-based, no need for source filter)
-                check_cmd = ["iptables", "-C", "FORWARD", "-i", pia_interface, "-d", device_ip, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"]
-                result = subprocess.run(check_cmd, capture_output=True, check=False)
-
-                if result.returncode != 0:
-                    add_cmd = ["iptables", "-A", "FORWARD", "-i", pia_interface, "-d", device_ip, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"]
-                    subprocess.run(add_cmd, check=True, capture_output=True)
-                    logger.info(f"Added device-specific FORWARD rule: {pia_interface} -> {device_ip} (established)")
-            else:
+            if not device_ip:
                 # Legacy global rule (deprecated - should not be used)
                 logger.warning(f"Creating global FORWARD rule for {pia_interface} without device restriction - this may cause traffic leakage")
 
-                result = subprocess.run(
-                    ["iptables", "-C", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", pia_interface, "-j", "ACCEPT"],
-                    capture_output=True,
-                    check=False
-                )
-
-                if result.returncode != 0:
-                    subprocess.run(
-                        ["iptables", "-A", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", pia_interface, "-j", "ACCEPT"],
-                        check=True,
-                        capture_output=True
-                    )
-                    logger.info(f"Added global FORWARD rule Tailscale -> {pia_interface}")
-
-                result = subprocess.run(
-                    ["iptables", "-C", "FORWARD", "-i", pia_interface, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                    capture_output=True,
-                    check=False
-                )
-
-                if result.returncode != 0:
-                    subprocess.run(
-                        ["iptables", "-A", "FORWARD", "-i", pia_interface, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                        check=True,
-                        capture_output=True
-                    )
-                    logger.info(f"Added global FORWARD rule {pia_interface} -> Tailscale (established)")
-
+            await self._ensure_iptables_rules(self._forward_rules(pia_interface, device_ip))
             return True
 
         except subprocess.CalledProcessError as e:
@@ -504,37 +606,7 @@ class RoutingService:
             True if successful
         """
         try:
-            for proto in ["udp", "tcp"]:
-                for dns_server in PIA_DNS_SERVERS:
-                    # Check if DNS intercept rule exists
-                    result = subprocess.run(
-                        [
-                            "iptables", "-t", "nat", "-C", "PREROUTING",
-                            "-i", TAILSCALE_INTERFACE,
-                            "-p", proto, "--dport", "53",
-                            "-j", "DNAT", "--to-destination", f"{dns_server}:53"
-                        ],
-                        capture_output=True,
-                        check=False
-                    )
-
-                    if result.returncode != 0:
-                        # Rule doesn't exist, add it
-                        subprocess.run(
-                            [
-                                "iptables", "-t", "nat", "-I", "PREROUTING",
-                                "-i", TAILSCALE_INTERFACE,
-                                "-p", proto, "--dport", "53",
-                                "-j", "DNAT", "--to-destination", f"{dns_server}:53"
-                            ],
-                            check=True,
-                            capture_output=True
-                        )
-                        logger.info(f"Added DNS interception rule: {proto.upper()} queries -> {dns_server}")
-
-                    # Only use first DNS server for interception
-                    break
-
+            await self._ensure_iptables_rules(self._dns_interception_rules())
             logger.info("DNS interception rules ensured (prevents DNS leaks)")
             return True
 
@@ -571,25 +643,33 @@ class RoutingService:
             # Remove device-specific rules
             await self.clear_device_rules()
 
-            # Remove base rules
-            subprocess.run(
-                ["iptables", "-t", "nat", "-D", "POSTROUTING", "-o", PIA_INTERFACE, "-j", "MASQUERADE"],
-                capture_output=True,
-                check=False
-            )
+            async with self._iptables_lock:
+                try:
+                    # Remove base rules
+                    await asyncio.to_thread(
+                        subprocess.run,
+                        ["iptables", "-t", "nat", "-D", "POSTROUTING", "-o", PIA_INTERFACE, "-j", "MASQUERADE"],
+                        capture_output=True,
+                        check=False
+                    )
 
-            subprocess.run(
-                ["iptables", "-D", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", PIA_INTERFACE, "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
+                    await asyncio.to_thread(
+                        subprocess.run,
+                        ["iptables", "-D", "FORWARD", "-i", TAILSCALE_INTERFACE, "-o", PIA_INTERFACE, "-j", "ACCEPT"],
+                        capture_output=True,
+                        check=False
+                    )
 
-            subprocess.run(
-                ["iptables", "-D", "FORWARD", "-i", PIA_INTERFACE, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
-                capture_output=True,
-                check=False
-            )
+                    await asyncio.to_thread(
+                        subprocess.run,
+                        ["iptables", "-D", "FORWARD", "-i", PIA_INTERFACE, "-o", TAILSCALE_INTERFACE, "-m", "state", "--state", "RELATED,ESTABLISHED", "-j", "ACCEPT"],
+                        capture_output=True,
+                        check=False
+                    )
+                finally:
+                    self._iptables_rules = None
 
+            self._ip_rules.clear()
             logger.info("Cleaned up routing rules")
             return True
 
@@ -604,7 +684,8 @@ class RoutingService:
             List of rule descriptions
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["iptables", "-t", "nat", "-L", "POSTROUTING", "-v", "-n"],
                 capture_output=True,
                 text=True,
@@ -630,14 +711,16 @@ class RoutingService:
         """
         try:
             # Try iptables-save (Debian/Ubuntu)
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["which", "iptables-save"],
                 capture_output=True,
                 check=False
             )
 
             if result.returncode == 0:
-                subprocess.run(
+                await asyncio.to_thread(
+                    subprocess.run,
                     ["sh", "-c", "iptables-save > /etc/iptables/rules.v4"],
                     check=True,
                     capture_output=True
@@ -653,13 +736,7 @@ class RoutingService:
             return False
 
 
-# Global service instance
-_routing_service: Optional[RoutingService] = None
-
-
+@lru_cache(maxsize=1)
 def get_routing_service() -> RoutingService:
     """Get or create routing service instance."""
-    global _routing_service
-    if _routing_service is None:
-        _routing_service = RoutingService()
-    return _routing_service
+    return RoutingService()
@@ -0,0 +1,158 @@
+"""VPN status snapshots shared between the status endpoints and the WebSocket stream."""
+
+import asyncio
+import time
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+from app.models import PIARegionsDB
+from .pia_service import get_pia_service
+
+logger = logging.getLogger(__name__)
+
+# Default maximum age of a reusable snapshot when no monitor is running
+SNAPSHOT_MAX_AGE_MS = 200
+
+# How often the background monitor refreshes the snapshot in seconds
+STATUS_MONITOR_INTERVAL = 0.5
+
+
+class StatusSnapshotter:
+    """Builds VPN status snapshots, sharing one computation between concurrent callers."""
+
+    def __init__(self):
+        self._snapshot: Optional[asyncio.Future] = None
+        self._snapshot_time: float = 0
+        self._default_max_age_ms: float = SNAPSHOT_MAX_AGE_MS
+
+    async def get_snapshot(self, max_age_ms: Optional[float] = None) -> Dict:
+        """Get a VPN status snapshot.
+
+        Callers arriving while a snapshot is being built, or within max_age_ms
+        of the last one, get that snapshot instead of triggering new `nmcli`
+        and `wg show` calls. The returned dict is shared and must not be modified.
+
+        Args:
+            max_age_ms: Maximum age of a completed snapshot that may be reused
+                (default: 200ms, or two refresh intervals while monitor() is running)
+
+        Returns:
+            Dict with active_count and per-connection details
+        """
+        if max_age_ms is None:
+            max_age_ms = self._default_max_age_ms
+
+        snapshot = self._snapshot
+        now = time.monotonic()
+
+        if snapshot is None or (snapshot.done() and (now - self._snapshot_time) * 1000 > max_age_ms):
+            snapshot = asyncio.ensure_future(self._build_snapshot())
+            self._snapshot = snapshot
+            # Age is counted from completion (set by _snapshot_done)
+            self._snapshot_time = float("inf")
+            snapshot.add_done_callback(self._snapshot_done)
+
+        try:
+            # Shield so one cancelled caller doesn't cancel the build for everyone else
+            return await asyncio.shield(snapshot)
+        except Exception:
+            # Don't hand a failed snapshot to the next caller
+            if self._snapshot is snapshot:
+                self._snapshot = None
+            raise
+
+    def _snapshot_done(self, snapshot: asyncio.Future):
+        """Record when the current snapshot finished building."""
+        if self._snapshot is snapshot:
+            self._snapshot_time = time.monotonic()
+
+    async def monitor(self, interval: float = STATUS_MONITOR_INTERVAL):
+        """Background task that keeps the snapshot fresh.
+
+        While it runs, readers get the monitor's latest snapshot, so request
+        and WebSocket traffic no longer drive `nmcli`/`wg show` calls.
+
+        Args:
+            interval: Seconds between snapshot refreshes
+        """
+        logger.info("Starting VPN status monitor...")
+        self._default_max_age_ms = interval * 2000
+
+        try:
+            while True:
+                try:
+                    await self.get_snapshot(max_age_ms=0)
+                except Exception as e:
+                    logger.error(f"Error in VPN status monitor: {e}")
+
+                await asyncio.sleep(interval)
+        finally:
+            self._default_max_age_ms = SNAPSHOT_MAX_AGE_MS
+
+    async def _build_snapshot(self) -> Dict:
+        """Collect active connections with region names and interface details.
+
+        Returns:
+            Dict with active_count and per-connection details
+        """
+        pia_service = get_pia_service()
+        active_connections = await pia_service.get_active_connections()
+
+        if not active_connections:
+            return {"active_count": 0, "connections": []}
+
+        # Look up all region names and all interface details at once
+        regions, interfaces = await asyncio.gather(
+            PIARegionsDB.get_by_ids(conn["region_id"] for conn in active_connections),
+            pia_service.get_all_interface_details()
+        )
+        connections = [
+            self._describe_connection(conn, regions, interfaces)
+            for conn in active_connections
+        ]
+
+        return {
+            "active_count": len(connections),
+            "connections": connections
+        }
+
+    @staticmethod
+    def _describe_connection(conn: Dict, regions: Dict, interfaces: Dict) -> Dict:
+        """Add region name and WireGuard interface details to an active connection.
+
+        Args:
+            conn: Active connection dict with region_id and interface
+            regions: Region rows keyed by region ID (from PIARegionsDB.get_by_ids)
+            interfaces: Interface details keyed by interface name
+                (from PIAService.get_all_interface_details)
+
+        Returns:
+            Connection info dict for status responses
+        """
+        region_id = conn["region_id"]
+        interface = conn["interface"]
+
+        region = regions.get(region_id)
+        region_name = region["name"] if region else region_id
+
+        # Interface details (handshake time, transfer stats)
+        interface_details = interfaces.get(interface, {})
+
+        return {
+            "region_id": region_id,
+            "region_name": region_name,
+            "interface": interface,
+            "endpoint_ip": interface_details.get("endpoint_ip"),
+            "last_handshake": interface_details.get("last_handshake", "N/A"),
+            "transfer_rx": interface_details.get("transfer_rx"),
+            "transfer_tx": interface_details.get("transfer_tx"),
+            "transfer_rx_bytes": interface_details.get("transfer_rx_bytes", 0),
+            "transfer_tx_bytes": interface_details.get("transfer_tx_bytes", 0)
+        }
+
+
+@lru_cache(maxsize=1)
+def get_status_snapshotter() -> StatusSnapshotter:
+    """Get or create status snapshotter instance."""
+    return StatusSnapshotter()
@@ -4,12 +4,16 @@ import asyncio
 import subprocess
 import json
 import httpx
+from functools import lru_cache
 from typing import Optional, Dict, List
 import logging
 
+from .cache import async_ttl_cache
+
 logger = logging.getLogger(__name__)
 
 TAILSCALE_API_BASE = "https://api.tailscale.com/api/v2"
+STATUS_CACHE_TTL = 1.0  # seconds; coalesces `tailscale status` calls from concurrent requests
 
 
 class TailscaleService:
@@ -26,6 +30,10 @@ class TailscaleService:
             api_key: Tailscale API key
         """
         self.api_key = api_key
+        self.get_local_status.cache_clear()
+        self.get_tailnet_name.cache_clear()
+        self.get_exit_node_status.cache_clear()
+
         if self.client:
             asyncio.create_task(self.client.aclose())
 
@@ -44,6 +52,7 @@ class TailscaleService:
         if self.client:
             await self.client.aclose()
 
+    @async_ttl_cache(STATUS_CACHE_TTL)
     async def get_local_status(self) -> Dict:
         """Get local Tailscale status via CLI.
 
@@ -51,7 +60,8 @@ class TailscaleService:
             Status dictionary
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["tailscale", "status", "--json"],
                 capture_output=True,
                 text=True,
@@ -91,6 +101,7 @@ class TailscaleService:
                 "peer_count": 0
             }
 
+    @async_ttl_cache(STATUS_CACHE_TTL)
     async def get_tailnet_name(self) -> Optional[str]:
         """Get the tailnet name from local status.
 
@@ -159,6 +170,7 @@ class TailscaleService:
                     "name": device.get("name"),
                     "ip_addresses": device.get("addresses", []),
                     "os": device.get("os"),
+                    "os_norm": (device.get("os") or "").lower(),
                     "last_seen": device.get("lastSeen"),
                     "online": not device.get("expires")  # If no expiry, it's online
                 })
@@ -177,7 +189,8 @@ class TailscaleService:
             List of devices
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["tailscale", "status", "--json"],
                 capture_output=True,
                 text=True,
@@ -207,6 +220,7 @@ class TailscaleService:
                     "name": peer.get("DNSName", "").split(".")[0],
                     "ip_addresses": peer.get("TailscaleIPs", []),
                     "os": peer.get("OS"),
+                    "os_norm": (peer.get("OS") or "").lower(),
                     "last_seen": peer.get("LastSeen"),
                     "online": peer.get("Online", False)
                 })
@@ -238,7 +252,8 @@ class TailscaleService:
             True if exit node is advertised
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["tailscale", "status", "--json"],
                 capture_output=True,
                 text=True,
@@ -267,13 +282,18 @@ class TailscaleService:
         try:
             flag = "--advertise-exit-node" if enable else "--advertise-exit-node=false"
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["tailscale", "up", flag],
                 capture_output=True,
                 text=True,
                 check=True
             )
 
+            # Exit node state changed; don't serve stale status
+            self.get_local_status.cache_clear()
+            self.get_exit_node_status.cache_clear()
+
             action = "advertised" if enable else "un-advertised"
             logger.info(f"Exit node {action}: {result.stdout}")
             return True
@@ -282,6 +302,7 @@ class TailscaleService:
             logger.error(f"Failed to advertise exit node: {e.stderr}")
             return False
 
+    @async_ttl_cache(STATUS_CACHE_TTL)
     async def get_exit_node_status(self) -> Dict:
         """Get exit node status details.
 
@@ -289,7 +310,8 @@ class TailscaleService:
             Exit node status dictionary
         """
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 ["tailscale", "status", "--json"],
                 capture_output=True,
                 text=True,
@@ -334,13 +356,7 @@ class TailscaleService:
             return None
 
 
-# Global service instance
-_tailscale_service: Optional[TailscaleService] = None
-
-
+@lru_cache(maxsize=1)
 def get_tailscale_service() -> TailscaleService:
     """Get or create Tailscale service instance."""
-    global _tailscale_service
-    if _tailscale_service is None:
-        _tailscale_service = TailscaleService()
-    return _tailscale_service
+    return TailscaleService()
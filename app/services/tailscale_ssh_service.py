@@ -1,15 +1,56 @@
 """Tailscale SSH service for remotely configuring exit nodes."""
 
+import asyncio
 import subprocess
 import logging
-from typing import Dict, Optional
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Reuse one master SSH connection per (user, host, port) instead of paying
+# TCP setup + key exchange + auth on every command. Idle masters are closed
+# by OpenSSH itself after SSH_CONTROL_PERSIST seconds.
+SSH_CONTROL_DIR = Path("/run/pia-router/ssh")
+SSH_CONTROL_PERSIST = 300
+
 
 class TailscaleSSHService:
     """Service to remotely configure Tailscale exit nodes via SSH."""
 
+    def __init__(self):
+        SSH_CONTROL_DIR.mkdir(parents=True, exist_ok=True, mode=0o700)
+
+    def _build_ssh_command(
+        self,
+        device_target: str,
+        username: str,
+        remote_command: str,
+        connect_timeout: int = 10
+    ) -> List[str]:
+        """Build an ssh command line that multiplexes over a persistent master connection.
+
+        Args:
+            device_target: Tailscale IP or hostname to SSH to
+            username: SSH username
+            remote_command: Command to run on the remote device
+            connect_timeout: Connection timeout in seconds (only applies when opening a new master)
+
+        Returns:
+            Command argument list
+        """
+        return [
+            "ssh",
+            "-o", "StrictHostKeyChecking=no",
+            "-o", f"ConnectTimeout={connect_timeout}",
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={SSH_CONTROL_DIR}/%C",
+            "-o", f"ControlPersist={SSH_CONTROL_PERSIST}",
+            f"{username}@{device_target}",
+            remote_command
+        ]
+
     async def set_exit_node_via_ssh(
         self,
         device_target: str,
@@ -35,17 +76,16 @@ class TailscaleSSHService:
             log_name = device_hostname or device_target
 
             # Command to set exit node on remote device
-            cmd = [
-                "ssh",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "ConnectTimeout=10",
-                f"{username}@{device_target}",
+            cmd = self._build_ssh_command(
+                device_target,
+                username,
                 f"tailscale set --exit-node={exit_node_ip} --exit-node-allow-lan-access"
-            ]
+            )
 
             logger.info(f"Setting exit node on {log_name} to {exit_node_ip} via SSH")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -106,17 +146,12 @@ class TailscaleSSHService:
             # Use hostname for logging if provided, otherwise use target
             log_name = device_hostname or device_target
 
-            cmd = [
-                "ssh",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "ConnectTimeout=10",
-                f"{username}@{device_target}",
-                "tailscale set --exit-node="
-            ]
+            cmd = self._build_ssh_command(device_target, username, "tailscale set --exit-node=")
 
             logger.info(f"Disabling exit node on {log_name} via SSH")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -177,15 +212,15 @@ class TailscaleSSHService:
             # Use hostname for logging if provided, otherwise use target
             log_name = device_hostname or device_target
 
-            cmd = [
-                "ssh",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "ConnectTimeout=5",
-                f"{username}@{device_target}",
-                "tailscale status --json 2>/dev/null | grep -oP '\"ExitNodeOption\":\\s*\"\\K[^\"]*' || echo ''"
-            ]
+            cmd = self._build_ssh_command(
+                device_target,
+                username,
+                "tailscale status --json 2>/dev/null | grep -oP '\"ExitNodeOption\":\\s*\"\\K[^\"]*' || echo ''",
+                connect_timeout=5
+            )
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -227,14 +262,9 @@ class TailscaleSSHService:
             # Use hostname for logging if provided, otherwise use target
             log_name = device_hostname or device_target
 
-            result = subprocess.run(
-                [
-                    "ssh",
-                    "-o", "StrictHostKeyChecking=no",
-                    "-o", "ConnectTimeout=5",
-                    f"{username}@{device_target}",
-                    "echo test"
-                ],
+            result = await asyncio.to_thread(
+                subprocess.run,
+                self._build_ssh_command(device_target, username, "echo test", connect_timeout=5),
                 capture_output=True,
                 timeout=10
             )
@@ -246,13 +276,7 @@ class TailscaleSSHService:
             return False
 
 
-# Global service instance
-_tailscale_ssh_service: Optional[TailscaleSSHService] = None
-
-
+@lru_cache(maxsize=1)
 def get_tailscale_ssh_service() -> TailscaleSSHService:
     """Get or create Tailscale SSH service instance."""
-    global _tailscale_ssh_service
-    if _tailscale_ssh_service is None:
-        _tailscale_ssh_service = TailscaleSSHService()
-    return _tailscale_ssh_service
+    return TailscaleSSHService()